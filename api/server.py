@@ -0,0 +1,269 @@
+"""Headless HTTP API for the resume and message pipeline.
+
+Exposes the same steps as the Streamlit app as JSON endpoints, so other
+services can call them without a browser session:
+
+    python -m api.server --port 8080
+
+    POST /extract            PDF body or multipart "file" -> text and links
+    POST /upload             PDF body or multipart "file" -> text, links and summary
+    POST /summarize          {"text": ...} -> summary
+    POST /generate-template  UserInput fields (+ "message_types", "variants") -> template(s)
+    POST /render             {"template", "recipient_name", "company_name", ...}
+                             or {"template", "recipients": [...]} -> message(s)
+    GET  /metrics            Prometheus counters
+    GET  /health
+
+The Groq key is read from the `X-Groq-Api-Key` header (or `Authorization:
+Bearer ...`), falling back to GROQ_API_KEY. Blocking work runs in a bounded
+thread pool; requests beyond API_MAX_PENDING get 503 and requests slower
+than API_TIMEOUT get 504. Errors are always JSON `{"error": ...}`.
+"""
+import argparse
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from aiohttp import web
+from pdfminer.psparser import PSException
+from pydantic import ValidationError
+
+from chains.message_chain import MAX_VARIANTS, generate_message_template, generate_message_variants
+from models.schema import UserInput
+from utils.bulk_render import render_rows
+from utils.classify_links import classify_links
+from utils.config import (
+    LLMContext,
+    get_api_max_pending,
+    get_api_timeout,
+    get_api_workers,
+    get_pdf_max_bytes,
+)
+from utils.format_message import MissingFieldsError, format_message_with_placeholders
+from utils.pdf_worker import PdfLimitError, PdfTimeoutError, PdfWorkerError, get_pdf_extractor
+from utils.pipeline import process_resume
+from utils.summarize_resume import extract_resume_summary
+from utils.tracing import get_tracer, incr
+
+POOL = web.AppKey("pool", ThreadPoolExecutor)
+SLOTS = web.AppKey("slots", asyncio.Semaphore)
+TIMEOUT = web.AppKey("timeout", float)
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+def _context(request: web.Request) -> Optional[LLMContext]:
+    api_key = request.headers.get("X-Groq-Api-Key", "")
+    authorization = request.headers.get("Authorization", "")
+    if not api_key and authorization.lower().startswith("bearer "):
+        api_key = authorization[len("bearer "):].strip()
+    # None falls back to GROQ_API_KEY, as for scripts and the CLI
+    return LLMContext(api_key=api_key) if api_key else None
+
+
+async def _json_body(request: web.Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise ApiError(400, "Request body must be JSON.")
+    if not isinstance(body, dict):
+        raise ApiError(400, "Request body must be a JSON object.")
+    return body
+
+
+def _user_input(fields: dict) -> UserInput:
+    # Request validation is a 400; a ValidationError anywhere else is the model's fault
+    try:
+        return UserInput(**fields)
+    except ValidationError as e:
+        raise ApiError(400, "Invalid request.", details=e.errors(include_url=False))
+
+
+async def _pdf_body(request: web.Request) -> bytes:
+    if request.content_type.startswith("multipart/"):
+        form = await request.post()
+        upload = form.get("file")
+        if not isinstance(upload, web.FileField):
+            raise ApiError(400, 'Multipart body must contain a "file" field.')
+        return upload.file.read()
+    data = await request.read()
+    if not data:
+        raise ApiError(400, "Request body must be a PDF.")
+    return data
+
+
+async def _run(request: web.Request, fn, *args, **kwargs):
+    """Run blocking `fn` on the worker pool under the pending and time limits."""
+    slots = request.app[SLOTS]
+    if slots.locked():
+        incr("api_rejected_total", endpoint=request.path)
+        raise ApiError(503, "Server is busy, try again later.")
+    async with slots:
+        loop = asyncio.get_running_loop()
+        call = loop.run_in_executor(request.app[POOL], functools.partial(fn, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(call, timeout=request.app[TIMEOUT])
+        except asyncio.TimeoutError:
+            incr("api_timeouts_total", endpoint=request.path)
+            raise ApiError(504, f"Request took longer than {request.app[TIMEOUT]:g} seconds.")
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    incr("api_requests_total", endpoint=request.path)
+    try:
+        return await handler(request)
+    except ApiError as e:
+        return web.json_response({"error": str(e), **e.details}, status=e.status)
+    except PdfLimitError as e:
+        return web.json_response({"error": str(e)}, status=413)
+    except PdfTimeoutError as e:
+        return web.json_response({"error": str(e)}, status=504)
+    except PdfWorkerError as e:
+        return web.json_response({"error": str(e)}, status=503)
+    except PSException:
+        return web.json_response({"error": "Request body is not a readable PDF."}, status=422)
+    except MissingFieldsError as e:
+        return web.json_response({"error": str(e), "missing": e.missing}, status=422)
+    except ValidationError:
+        # Request bodies are validated in the handlers, so this is an LLM reply
+        # that could not be parsed; its raw text is not echoed back
+        return web.json_response({"error": "The model did not return a valid reply."}, status=502)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except web.HTTPException:
+        raise
+    except Exception:
+        # A bug, not a bad request: keep the traceback in the server log only
+        request.app.logger.exception("Unhandled error in %s", request.path)
+        incr("api_errors_total", endpoint=request.path)
+        return web.json_response({"error": "Internal server error."}, status=500)
+
+
+def _extract(data: bytes, context: Optional[LLMContext]) -> dict:
+    parsed = get_pdf_extractor().extract(data)
+    return {
+        "text": parsed.text,
+        "pages": len(parsed.pages),
+        "links": classify_links(parsed.links, context=context),
+    }
+
+
+async def extract(request: web.Request) -> web.Response:
+    data = await _pdf_body(request)
+    return web.json_response(await _run(request, _extract, data, _context(request)))
+
+
+async def upload(request: web.Request) -> web.Response:
+    data = await _pdf_body(request)
+    try:
+        text, links, summary = await _run(request, process_resume, data, context=_context(request))
+    except ValidationError:
+        raise ApiError(502, "The model did not return a valid summary.")
+    return web.json_response({"text": text, "links": links, "summary": summary})
+
+
+async def summarize(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    text = body.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise ApiError(400, 'Field "text" must be a non-empty string.')
+    try:
+        summary = await _run(request, extract_resume_summary, text, context=_context(request))
+    except ValidationError:
+        raise ApiError(502, "The model did not return a valid summary.")
+    if summary is None:
+        raise ApiError(502, "The model did not return a valid summary.")
+    return web.json_response({"summary": summary})
+
+
+async def generate_template(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    message_types = body.pop("message_types", None)
+    variants = body.pop("variants", 1)
+    if not isinstance(variants, int) or not 1 <= variants <= MAX_VARIANTS:
+        raise ApiError(400, f'Field "variants" must be an integer from 1 to {MAX_VARIANTS}.')
+    if message_types is None and variants == 1:
+        user_input = _user_input(body)
+        template = await _run(request, generate_message_template, user_input, _context(request))
+        return web.json_response({"template": template})
+
+    if message_types is None:
+        message_types = [body.get("message_type", "")]
+    if not isinstance(message_types, list) or not message_types \
+            or not all(isinstance(t, str) and t for t in message_types):
+        raise ApiError(400, 'Field "message_types" must be a list of message types.')
+    user_input = _user_input({"message_type": message_types[0], **body})
+    templates = await _run(request, generate_message_variants, user_input, message_types, variants,
+                           _context(request))
+    return web.json_response({"templates": templates})
+
+
+async def render(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    template = body.pop("template", None)
+    if not isinstance(template, str):
+        raise ApiError(400, 'Field "template" must be a string.')
+    recipients = body.pop("recipients", None)
+    if recipients is None:
+        message = format_message_with_placeholders(
+            template, body.pop("recipient_name", None), body.pop("company_name", None), **body
+        )
+        return web.json_response({"message": message})
+    if not isinstance(recipients, list) or not all(isinstance(r, dict) for r in recipients):
+        raise ApiError(400, 'Field "recipients" must be a list of objects.')
+    # Pure string work: cheap enough to stay on the event loop
+    strict = not body.get("allow_missing", False)
+    return web.json_response({"messages": list(render_rows(template, recipients, strict))})
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(text=get_tracer().prometheus_text(), content_type="text/plain")
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+async def _close_pool(app: web.Application) -> None:
+    app[POOL].shutdown(wait=False, cancel_futures=True)
+
+
+def create_app(workers: Optional[int] = None, max_pending: Optional[int] = None,
+               timeout: Optional[float] = None) -> web.Application:
+    """Build the aiohttp application; arguments default to the API_* settings."""
+    workers = workers if workers is not None else get_api_workers()
+    # Multipart overhead on top of the largest PDF accepted
+    app = web.Application(middlewares=[error_middleware], client_max_size=get_pdf_max_bytes() + 1024 * 1024)
+    app[POOL] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+    app[SLOTS] = asyncio.Semaphore(max_pending if max_pending is not None else get_api_max_pending())
+    app[TIMEOUT] = float(timeout if timeout is not None else get_api_timeout())
+    app.on_cleanup.append(_close_pool)
+    app.add_routes([
+        web.post("/extract", extract),
+        web.post("/upload", upload),
+        web.post("/summarize", summarize),
+        web.post("/generate-template", generate_template),
+        web.post("/render", render),
+        web.get("/metrics", metrics),
+        web.get("/health", health),
+    ])
+    return app
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
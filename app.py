@@ -1,12 +1,26 @@
 # cold_message_generator/app.py
 import streamlit as st
-from utils.extract_text import extract_text_and_links
-from utils.summarize_resume import extract_resume_summary
-from utils.config import set_groq_api_key
-from chains.message_chain import generate_message_template
-from utils.format_message import format_message_with_placeholders
+from utils.pdf_worker import PdfLimitError, PdfTimeoutError, PdfWorkerError
+from utils.jobs import get_job_runner
+from utils.pipeline import process_resume
+from utils.profile_store import get_profile_store, resume_hash
+from utils.relevance import summary_prompt_payload
+from utils.config import LLMContext, get_template_prefetch
+from utils.llm_client import get_registry
+from utils.model_router import get_router
+from chains.message_chain import (
+    MAX_VARIANTS,
+    cached_message_templates,
+    cancel_prefetch,
+    generate_message_variants,
+    get_message_prompt,
+    prefetch_message_template,
+    stream_message_template,
+)
+from utils.format_message import MissingFieldsError, compile_template, format_message_with_placeholders
+from utils.bulk_render import render_to_string
 from models.schema import UserInput
-import time
+import io
 
 
 # --- SEO Friendly Page Configuration ---
@@ -18,28 +32,35 @@ st.set_page_config(
 )
 # --- End SEO Friendly Page Configuration ---
 
-def display_temporary_message(message, duration=3):
-    """Displays a message that disappears after a given duration.
+@st.cache_resource(show_spinner=False)
+def warm_llm_clients(api_key):
+    """Builds the shared clients and prompt template once per key, not on every rerun.
 
     Args:
-        message (str): The message to display.
-        duration (int, optional): The duration in seconds for which the message is displayed.
-                                Defaults to 3.
+        api_key (str): The Groq API key the clients are built for.
     """
-    container = st.empty()
-    container.info(message)
-    time.sleep(duration)
-    container.empty()
+    # Summary, template and link classification clients, on either model tier
+    models = get_router().models.values()
+    get_registry().warm(api_key, [(model, temperature) for model in models for temperature in (0.1, 0.8, 1)])
+    get_message_prompt()
+    return True
 
 # 🔐 Sidebar for API Key
 st.sidebar.title("🔑 API Configuration")
 api_key = st.sidebar.text_input("Enter your Groq API Key", type="password")
 
+# The key is passed to each call in this context; nothing is written to os.environ,
+# so concurrent users of one server process cannot overwrite each other's key
+llm_context = LLMContext(api_key=api_key)
 if api_key:
-    set_groq_api_key(api_key)
+    warm_llm_clients(api_key)
     st.sidebar.success("API Key set successfully!")
 else:
     st.sidebar.warning("Please enter your Groq API Key")
+prefetch_enabled = st.sidebar.checkbox(
+    "Prepare templates in the background", value=get_template_prefetch(), key="prefetch_enabled",
+    help="Start generating the selected message type as soon as a summary is ready, so Generate Template returns at once.",
+)
 
 # 🧊 App Title
 st.title("🧊 Cold Message Generator")
@@ -52,6 +73,8 @@ if "links" not in st.session_state:
     st.session_state["links"] = {}
 if "template" not in st.session_state:
     st.session_state["template"] = ""
+if "summary_data" not in st.session_state:
+    st.session_state["summary_data"] = None
 if "last_uploaded_file_id" not in st.session_state:
     st.session_state["last_uploaded_file_id"] = None
 
@@ -62,6 +85,18 @@ uploaded_file = st.file_uploader("Upload your resume (PDF)", type=["pdf"])
 
 # This block should ONLY calculate new values and set them to st.session_state
 # It should NOT re-declare a widget or set a widget's value explicitly.
+def apply_upload_result(resume_text, extracted_links, summary_result):
+    """Moves a processed resume into session state for the widgets below."""
+    # Ensure the result is always a string
+    st.session_state["summary"] = str(summary_result) if summary_result is not None else ""
+    # Keep the structured summary for relevance-ranked prompts
+    st.session_state["summary_data"] = summary_result if isinstance(summary_result, dict) else None
+    st.toast("Resume summary generated.", icon="✅")
+
+    # Also update links and clear template
+    st.session_state["links"] = extracted_links if extracted_links else {}
+    st.session_state["template"] = "" # Clear template on new resume upload
+
 if uploaded_file and not api_key:
     st.warning("Enter Valid key")
 if uploaded_file and api_key:
@@ -69,20 +104,55 @@ if uploaded_file and api_key:
     if st.session_state["last_uploaded_file_id"] != uploaded_file.file_id:
         st.session_state["last_uploaded_file_id"] = uploaded_file.file_id # Update tracker
 
-        with st.spinner("Extracting text and links..."):
-            resume_text, extracted_links = extract_text_and_links(uploaded_file)
-        display_temporary_message("Resume text and links extracted successfully.",duration=3)
+        # A newer upload replaces any job still waiting for a worker
+        previous_job = st.session_state.pop("upload_job", None)
+        if previous_job is not None:
+            previous_job.cancel()
+        resume_bytes = uploaded_file.getvalue()
+        profile_store = get_profile_store()
+        profile = profile_store.get_profile(resume_hash(resume_bytes)) if profile_store is not None else None
+        if profile is not None:
+            # Seen before (possibly in an earlier session): load it right away
+            apply_upload_result(profile.resume_text, profile.links, profile.summary)
+        else:
+            # Process in the background so the page stays usable
+            st.session_state["upload_job"] = get_job_runner().submit(
+                lambda report: process_resume(resume_bytes, report, context=llm_context), name="upload"
+            )
+
+UPLOAD_STAGE_LABELS = {
+    "extract": "Resume text and links extracted.",
+    "links": "Links classified.",
+    "summary": "Resume summary generated.",
+}
 
-        with st.spinner("Summarizing resume..."):
-            # This is the key: set the session state value here
-            summary_result = extract_resume_summary(resume_text)
-            # Ensure the result is always a string
-            st.session_state["summary"] = str(summary_result) if summary_result is not None else ""
-        st.success("Resume summary generated.")
+@st.fragment(run_every=0.5)
+def show_upload_progress():
+    """Polls the upload job, re-running only this fragment until it finishes."""
+    job = st.session_state.get("upload_job")
+    if job is None:
+        return
+    if job.done():
+        # Full rerun so the summary and links widgets pick up the result
+        st.rerun()
+    st.progress(job.progress, text=UPLOAD_STAGE_LABELS.get(job.stage, "Extracting text and links..."))
 
-        # Also update links and clear template
-        st.session_state["links"] = extracted_links if extracted_links else {}
-        st.session_state["template"] = "" # Clear template on new resume upload
+upload_job = st.session_state.get("upload_job")
+if upload_job is not None and upload_job.done():
+    # Collected exactly once; later reruns read session state only
+    del st.session_state["upload_job"]
+    try:
+        apply_upload_result(*upload_job.result())
+    except (PdfLimitError, PdfTimeoutError) as e:
+        st.error(f"Could not process this PDF: {e}")
+    except PdfWorkerError:
+        st.error("The PDF reader stopped unexpectedly while reading this file. Please try uploading it again.")
+    except Exception as e:
+        # The job failed (missing key, Groq error, unparseable summary):
+        # report it instead of surfacing a script traceback
+        st.error(f"Could not process this PDF: {e}")
+elif upload_job is not None:
+    show_upload_progress()
 
 
 # --- Widget Definition for Summary ---
@@ -114,31 +184,83 @@ st.session_state["linkedin"] = st.text_input("LinkedIn Link", value=links.get("l
 st.session_state["github"] = st.text_input("GitHub Link", value=links.get("github", ""), key="github_input")
 st.session_state["portfolio"] = st.text_input("Portfolio Link", value=links.get("portfolio", ""), key="portfolio_input")
 st.session_state["blog"] = st.text_input("blogSite Link", value=links.get("blog", ""), key="blog_input")
-message_type = st.selectbox("Message Type", ["Cold Email for referral","Cold email to connect","Cold Email for Job inquiry", "LinkedIn Message for refferal", "LinkedIn Message for career Guidance","LinkedIn Message for Job inquiry"], key="message_type_select")
+MESSAGE_TYPES = ["Cold Email for referral","Cold email to connect","Cold Email for Job inquiry", "LinkedIn Message for refferal", "LinkedIn Message for career Guidance","LinkedIn Message for Job inquiry"]
+message_type = st.selectbox("Message Type", MESSAGE_TYPES, key="message_type_select")
 job_type = st.text_input("Job Type:")
 
+with st.expander("Generate several at once"):
+    other_message_types = st.multiselect(
+        "Also generate", [t for t in MESSAGE_TYPES if t != message_type], key="other_message_types"
+    )
+    n_variants = st.number_input("Drafts per message type", min_value=1, max_value=MAX_VARIANTS, value=1,
+                                 key="template_variants")
+
+
+def build_user_input(message_type):
+    # Send only the parts of the summary relevant to the job type, unless
+    # the user has edited the summary text by hand
+    summary_data = st.session_state["summary_data"]
+    if summary_data and st.session_state["summary"] == str(summary_data):
+        prompt_summary = summary_prompt_payload(summary_data, job_type)
+    else:
+        prompt_summary = st.session_state["summary"]
+    return UserInput(
+        summary=prompt_summary,
+        resume =st.session_state["resume"],
+        linkedin=st.session_state["linkedin"],
+        github=st.session_state["github"],
+        portfolio=st.session_state["portfolio"],
+        blog=st.session_state["blog"],
+        message_type=message_type,
+        job_type=job_type
+    )
+
+
+# Speculatively generate the selected message type for the current summary,
+# links and job type. When any of them changes, the previous prefetch is
+# dropped if it has not started; its result would be cached under inputs
+# that no longer match, so it is never shown.
+if prefetch_enabled and api_key and st.session_state["summary"] and job_type:
+    prefetch_input = build_user_input(message_type)
+    previous_input = st.session_state.get("prefetch_input")
+    if previous_input != prefetch_input:
+        if previous_input is not None:
+            cancel_prefetch(previous_input)
+        prefetch_message_template(prefetch_input, context=llm_context)
+        st.session_state["prefetch_input"] = prefetch_input
+
 # Generate template
 if st.button("Generate Template", key="generate_template_button"):
     if not api_key:
-       display_temporary_message("Please enter your Groq API Key to generate a template.",duration=3)
+       st.toast("Please enter your Groq API Key to generate a template.", icon="🔑")
     elif not st.session_state["summary"]:
         st.error("Please upload a resume or provide a summary before generating a template.")
+    elif other_message_types or n_variants > 1:
+        with st.spinner("Generating templates..."):
+            templates = generate_message_variants(build_user_input(message_type), [message_type, *other_message_types],
+                                                  variants=n_variants, context=llm_context)
+        st.session_state["template"] = templates[message_type][0]
+        st.success(f"Generated {sum(len(v) for v in templates.values())} templates. Switch the Message Type to see the others.")
     else:
-        user_input = UserInput(
-            summary=st.session_state["summary"],
-            resume =st.session_state["resume"],
-            linkedin=st.session_state["linkedin"],
-            github=st.session_state["github"],
-            portfolio=st.session_state["portfolio"],
-            blog=st.session_state["blog"],
-            message_type=message_type,
-            job_type=job_type
-        )
-        with st.spinner("Generating message template..."):
-            template = generate_message_template(user_input)
+        # Render tokens as they arrive; write_stream returns the assembled text
+        stream_placeholder = st.empty()
+        template = stream_placeholder.write_stream(stream_message_template(build_user_input(message_type), context=llm_context))
+        stream_placeholder.empty()
         st.session_state["template"] = template
         st.success("Template generated successfully!")
 
+# Once a template is on screen, others generated earlier for this summary
+# and job type show up as soon as their message type is selected, without
+# another LLM call
+if st.session_state["summary"] and st.session_state["template"]:
+    generated = cached_message_templates(build_user_input(message_type))
+    if len(generated) > 1:
+        draft = st.radio("Draft", range(len(generated)), format_func=lambda i: f"Draft {i + 1}",
+                         horizontal=True, key="template_draft")
+        st.session_state["template"] = generated[min(draft, len(generated) - 1)]
+    elif generated:
+        st.session_state["template"] = generated[0]
+
 
 # Show template if available
 if st.session_state["template"]:
@@ -149,13 +271,47 @@ if st.session_state["template"]:
     recipient = st.text_input("Recipient Name", key="recipient_name")
     company = st.text_input("Company Name", key="company_name")
 
+    # Any other placeholders in the template (e.g. {role}, {referrer}, {team})
+    compiled_template = compile_template(st.session_state["template"])
+    extra_fields = {}
+    for field in compiled_template.fields:
+        if field not in ("recipient_name", "company_name"):
+            extra_fields[field] = st.text_input(field.replace("_", " ").title(), key=f"template_field_{field}")
+
     if st.button("Generate Message", key="generate_message_button"):
         if not recipient or not company:
             st.warning("Please enter both Recipient Name and Company Name.")
         else:
+            unfilled = compiled_template.missing(extra_fields, required=extra_fields)
+            if unfilled:
+                st.info(f"Left unfilled: {', '.join(unfilled)}")
+            filled = {field: value for field, value in extra_fields.items() if value}
             with st.spinner("Formatting final message..."):
-                final_message = format_message_with_placeholders(st.session_state["template"], recipient, company)
+                final_message = format_message_with_placeholders(st.session_state["template"], recipient, company, **filled)
             st.subheader("Generated Message")
             st.text_area("Message", final_message, height=300, key="final_message_output")
+
+    # Bulk mode: one template, many recipients, no LLM calls
+    with st.expander("Bulk Messages from a Recipient List"):
+        st.caption("Upload a CSV or JSONL with a column for every template placeholder "
+                   "(recipient_name/name, company_name/company, ...).")
+        recipients_file = st.file_uploader("Recipients", type=["csv", "jsonl"], key="recipients_file")
+        bulk_format = st.selectbox("Output Format", ["csv", "jsonl"], key="bulk_output_format")
+        if recipients_file and st.button("Render All Messages", key="bulk_render_button"):
+            input_format = "jsonl" if recipients_file.name.endswith(".jsonl") else "csv"
+            stream = io.StringIO(recipients_file.getvalue().decode("utf-8-sig"), newline="")
+            try:
+                output, stats = render_to_string(st.session_state["template"], stream, input_format, bulk_format)
+            except MissingFieldsError as e:
+                st.error(f"The recipient list has no column for: {', '.join(e.missing)}")
+            else:
+                st.success(f"Rendered {stats['rows'] - stats['errors']} messages ({stats['errors']} rows with missing fields).")
+                st.download_button(
+                    "Download Messages",
+                    output,
+                    file_name=f"messages.{bulk_format}",
+                    mime="text/csv" if bulk_format == "csv" else "application/jsonl",
+                    key="bulk_download_button",
+                )
 else:
     st.warning("Please generate a template first.")
\ No newline at end of file
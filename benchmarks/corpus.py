@@ -0,0 +1,110 @@
+"""Synthetic resume PDFs for benchmarks, written without any PDF library."""
+import os
+import random
+from typing import Dict, List
+
+SECTION_LINES = {
+    "EXPERIENCE": [
+        "Software Engineer | Acme Corp | Jan 2021 - Present",
+        "- Built REST APIs in Python serving 1M requests per day",
+        "- Reduced deployment time by 60% with CI/CD pipelines",
+        "- Mentored three junior engineers and led code reviews",
+    ],
+    "PROJECTS": [
+        "Resume Parser | Python, pdfminer, Streamlit",
+        "- Extracted structured data from PDF resumes",
+        "Realtime Chat | React, Node.js, WebSockets",
+    ],
+    "EDUCATION": ["B.Sc. Computer Science | State University | 2020"],
+    "SKILLS": ["Python, JavaScript, SQL, React, Docker, Kubernetes, AWS"],
+}
+
+LINK_TARGETS = [
+    "https://www.linkedin.com/in/jane-doe",
+    "https://github.com/janedoe",
+    "https://janedoe.vercel.app",
+    "https://dev.to/janedoe",
+    "https://example.com/projects/{n}",
+]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_lines(page: int, rng: random.Random) -> List[str]:
+    lines = ["Jane Doe - Software Engineer", "jane.doe@example.com | +1 555 0100", ""]
+    while len(lines) < 45:
+        heading = rng.choice(list(SECTION_LINES))
+        lines.append(heading)
+        lines.extend(SECTION_LINES[heading])
+        lines.append("")
+    lines.append(f"Page {page}")
+    return lines
+
+
+def make_resume_pdf(pages: int = 1, links_per_page: int = 2, seed: int = 0) -> bytes:
+    """Build a text PDF of `pages` resume-like pages with URI link annotations."""
+    rng = random.Random(seed)
+    objects: List[str] = []
+
+    def add(obj: str) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    font = add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add("")  # filled in once the page ids are known
+    page_ids = []
+    for page in range(1, pages + 1):
+        body = " T* ".join(f"({_escape(line)}) Tj" for line in _page_lines(page, rng))
+        stream = f"BT /F1 10 Tf 14 TL 50 750 Td {body} ET"
+        contents = add(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        annots = []
+        for n in range(links_per_page):
+            uri = LINK_TARGETS[n % len(LINK_TARGETS)].format(n=n)
+            y = 700 - 15 * (n % 40)
+            annots.append(add(f"<< /Type /Annot /Subtype /Link /Rect [50 {y} 250 {y + 12}] "
+                              f"/Border [0 0 0] /A << /S /URI /URI ({_escape(uri)}) >> >>"))
+        annots_ref = " ".join(f"{a} 0 R" for a in annots)
+        page_ids.append(add(f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 792] "
+                            f"/Contents {contents} 0 R /Resources << /Font << /F1 {font} 0 R >> >> "
+                            f"/Annots [{annots_ref}] >>"))
+    objects[pages_id - 1] = (f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] "
+                             f"/Count {len(page_ids)} >>")
+    catalog = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+# name -> (pages, links per page)
+CORPUS_SPECS = {
+    "1p": (1, 3),
+    "2p": (2, 3),
+    "5p": (5, 3),
+    "20p": (20, 3),
+    "50p": (50, 3),
+    "1p_many_links": (1, 200),
+    "5p_many_links": (5, 200),
+}
+
+
+def build_corpus(directory: str = "") -> Dict[str, bytes]:
+    """Generate the benchmark corpus, optionally also writing it to `directory`."""
+    corpus = {name: make_resume_pdf(pages, links, seed=i)
+              for i, (name, (pages, links)) in enumerate(CORPUS_SPECS.items())}
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name, data in corpus.items():
+            with open(os.path.join(directory, f"{name}.pdf"), "wb") as f:
+                f.write(data)
+    return corpus
@@ -0,0 +1,185 @@
+"""Offline benchmark suite for the resume and message pipeline.
+
+Runs every stage against a synthetic PDF corpus and the fake chat model, so
+no Groq key or network is needed:
+
+    python -m benchmarks.run                     # run all, save results
+    python -m benchmarks.run --filter pdf_parse  # only matching benchmarks
+    python -m benchmarks.run --compare <commit>  # flag regressions vs. a stored run
+
+Results are written to benchmarks/results/<commit>.json.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+# Read when the scheduler, caches and PDF pool are first built, so set before importing utils
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("PDF_WORKERS", "0")
+# An upload seen before would be answered from SQLite, and nothing is written to .cache
+os.environ.setdefault("PROFILE_STORE_PATH", "")
+os.environ.setdefault("SUMMARY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "cold-message-bench-cache"))
+
+from benchmarks.corpus import build_corpus  # noqa: E402
+from chains.message_chain import build_message_prompt  # noqa: E402
+from models.schema import UserInput  # noqa: E402
+from models.summary import Summary  # noqa: E402
+from utils.classify_links import classify_links  # noqa: E402
+from utils.extract_text import parse_pdf  # noqa: E402
+from utils.fake_llm import FAKE_SUMMARY, FAKE_TEMPLATE, fake_model_factory  # noqa: E402
+from utils.format_message import format_message_with_placeholders  # noqa: E402
+from utils.json_repair import parse_json_model  # noqa: E402
+from utils.llm_client import get_registry  # noqa: E402
+from utils.pipeline import process_resume  # noqa: E402
+from utils.resume_sections import apply_token_budget, clean_resume_text, split_sections  # noqa: E402
+from utils.summarize_resume import get_summary_prompt  # noqa: E402
+from utils.summary_cache import get_summary_cache  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _named_file(data: bytes, name: str = "resume.pdf") -> io.BytesIO:
+    f = io.BytesIO(data)
+    f.name = name
+    return f
+
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    get_registry().set_factory(fake_model_factory())
+    corpus = build_corpus()
+    texts = {name: parse_pdf(_named_file(data)).text for name, data in corpus.items()}
+    links = {name: parse_pdf(_named_file(data)).links for name, data in corpus.items()}
+    summary_json = json.dumps(FAKE_SUMMARY)
+    user_input = UserInput(summary=summary_json, linkedin="https://linkedin.com/in/janedoe",
+                           github="https://github.com/janedoe", message_type="Cold Email for referral",
+                           job_type="Backend Engineer")
+
+    benchmarks = {}
+    for name, data in corpus.items():
+        benchmarks[f"pdf_parse[{name}]"] = lambda data=data: parse_pdf(_named_file(data))
+    for name in ("1p_many_links", "5p_many_links", "5p"):
+        benchmarks[f"link_classify[{name}]"] = lambda urls=links[name]: classify_links(urls, use_llm=False)
+    for name in ("2p", "50p"):
+        text = texts[name]
+        benchmarks[f"resume_sections[{name}]"] = (
+            lambda text=text: apply_token_budget(split_sections(clean_resume_text(text)), 3000))
+        benchmarks[f"prompt_build_summary[{name}]"] = (
+            lambda text=text: get_summary_prompt().format(resume_text=text))
+    benchmarks["prompt_build_message"] = lambda: build_message_prompt(user_input)
+    benchmarks["output_parse_summary"] = lambda: parse_json_model(summary_json, Summary)
+    fenced_json = f"Here is the summary:\n```json\n{summary_json[:-1]},}}\n```"
+    benchmarks["output_repair_summary"] = lambda: parse_json_model(fenced_json, Summary)
+    benchmarks["format_placeholders"] = (
+        lambda: format_message_with_placeholders(FAKE_TEMPLATE, "Alex Smith", "Initech"))
+
+    def upload_uncached(data=corpus["2p"]):
+        get_summary_cache().clear()
+        return process_resume(_named_file(data), use_store=False)
+
+    benchmarks["upload_e2e[2p]"] = upload_uncached
+    return benchmarks
+
+
+def measure(fn: Callable[[], object], iterations: int, min_time: float = 0.2) -> dict:
+    fn()  # warm-up
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < iterations or (time.perf_counter() - started < min_time and len(timings) < iterations * 20):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(timings, n=20) if len(timings) > 1 else timings * 19
+    return {
+        "runs": len(timings),
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": statistics.median(timings),
+        "p95_ms": quantiles[18],
+        "peak_kb": peak / 1024,
+    }
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(ref: str) -> dict:
+    path = ref if os.path.isfile(ref) else os.path.join(RESULTS_DIR, f"{ref}.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def report(results: dict, baseline: dict = None, threshold: float = 0.1) -> int:
+    """Print a results table; returns the number of regressions against `baseline`."""
+    regressions = 0
+    header = f"{'benchmark':36} {'p50 ms':>10} {'p95 ms':>10} {'peak KB':>10}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    base_stats = (baseline or {}).get("benchmarks", {})
+    for name, stats in results["benchmarks"].items():
+        line = f"{name:36} {stats['p50_ms']:10.3f} {stats['p95_ms']:10.3f} {stats['peak_kb']:10.1f}"
+        base = base_stats.get(name)
+        if base:
+            change = (stats["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            regressions += bool(flag)
+            line += f" {change:+11.1%}{flag}"
+        print(line)
+    return regressions
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--iterations", type=int, default=20, help="minimum timed runs per benchmark")
+    arg_parser.add_argument("--filter", default="", help="only run benchmarks containing this text")
+    arg_parser.add_argument("--compare", default="", help="commit or results file to compare against")
+    arg_parser.add_argument("--threshold", type=float, default=0.1, help="p50 slowdown counted as a regression")
+    arg_parser.add_argument("--no-save", action="store_true", help="do not write results to benchmarks/results")
+    args = arg_parser.parse_args(argv)
+
+    results = {
+        "commit": current_commit(),
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for name, fn in build_benchmarks().items():
+        if args.filter in name:
+            results["benchmarks"][name] = measure(fn, args.iterations)
+
+    baseline = load_results(args.compare) if args.compare else None
+    regressions = report(results, baseline, args.threshold)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
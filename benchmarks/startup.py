@@ -0,0 +1,90 @@
+"""Cold-start and rerun cost of the Streamlit app.
+
+Measures, with the fake chat model and no network:
+
+* import time of the modules app.py pulls in, each in a fresh interpreter
+  (what a new container or worker pays before the first page render);
+* the first script run of app.py and the time of each later rerun, via
+  Streamlit's AppTest, with a summary loaded so the template widgets render.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --reruns 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = (
+    "streamlit",
+    "utils.pipeline",
+    "chains.message_chain",
+    "utils.summarize_resume",
+    "utils.classify_links",
+    "utils.relevance",
+    "utils.bulk_render",
+)
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def import_ms(module: str, runs: int) -> float:
+    """Median time to import `module` in a fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        timings.append(float(out.strip().splitlines()[-1]) * 1000)
+    return statistics.median(timings)
+
+
+def app_run_ms(reruns: int) -> dict:
+    """First run and per-rerun time of app.py under AppTest."""
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("FAKE_LLM_LATENCY", "0")
+    from streamlit.testing.v1 import AppTest
+
+    from utils.fake_llm import FAKE_SUMMARY
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    started = time.perf_counter()
+    app.run()
+    first = (time.perf_counter() - started) * 1000
+
+    app.sidebar.text_input[0].input("benchmark").run()
+    app.session_state["summary"] = str(FAKE_SUMMARY)
+    app.session_state["summary_data"] = FAKE_SUMMARY
+    app.run()
+
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"first_run_ms": first, "rerun_p50_ms": statistics.median(timings), "rerun_max_ms": max(timings)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module import")
+    parser.add_argument("--reruns", type=int, default=20, help="app reruns to time")
+    args = parser.parse_args(argv)
+
+    print(f"{'cold import':36} {'ms':>10}")
+    print("-" * 47)
+    for module in MODULES:
+        print(f"{module:36} {import_ms(module, args.runs):10.1f}")
+
+    print()
+    for name, value in app_run_ms(args.reruns).items():
+        print(f"{'app ' + name:36} {value:10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
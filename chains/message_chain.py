@@ -1,7 +1,16 @@
-from langchain.prompts import PromptTemplate
-from langchain_groq import ChatGroq
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from models.schema import UserInput
-from utils.config import get_groq_api_key
+from utils.config import LLMContext, resolve_context
+from utils.llm_client import get_chat_model
+from utils.model_router import get_router
+from utils.profile_store import TemplateRecord, get_profile_store, summary_hash
+from utils.scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, get_scheduler
+from utils.template_cache import get_template_cache, template_cache_key
+from utils.tracing import incr, record_llm_usage, span
 
 
 
@@ -9,8 +18,7 @@ from utils.config import get_groq_api_key
 # Revised Prompt Template
 # The prompt now explicitly asks for a Python-formatted string
 # It treats the UserInput as a JSON string to guide the LLM
-message_prompt = PromptTemplate.from_template(
-    """You are an expert at crafting professional outreach messages.
+MESSAGE_PROMPT = """You are an expert at crafting professional outreach messages.
 Given the following user details and requested message type, generate a concise and compelling {message_type}.
 
 User Details (JSON format for clarity):
@@ -28,33 +36,256 @@ Focus on:
 
 Return ONLY the complete message content. Do NOT include any other text, formatting (like markdown code blocks), or explanations.
 """
-)
 
-def generate_message_template(user_input: UserInput) -> str:
+@lru_cache(maxsize=None)
+def get_message_prompt():
+    # Importing langchain's prompt classes takes a few hundred ms, so it is
+    # deferred to the first template instead of every app cold start
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate.from_template(MESSAGE_PROMPT)
+
+MESSAGE_TEMPERATURE = 0.8 # Increased temperature slightly for more creative message generation
+MAX_VARIANTS = 3
+
+# Appended for variants after the first so each one is a distinct request
+VARIANT_HINT = "\nThis is alternative draft #{number}: use a different opening line, angle and subject than a first draft would.\n"
+
+
+def build_message_prompt(user_input: UserInput, variant: int = 0) -> str:
     # Convert the UserInput Pydantic model to a JSON string
     # This helps the LLM understand the structured input better
-    user_input_json_str = user_input.model_dump_json(indent=2) # Use indent for readability if LLM sees it
+    user_input_json_str = user_input.model_dump_json() # Compact JSON: indentation only costs prompt tokens
 
     # Format the prompt with the stringified user input
     # Also pass job_type for more specific message generation
-    prompt_formatted = message_prompt.format(
+    prompt = get_message_prompt().format(
         user_input_json=user_input_json_str,
         message_type=user_input.message_type,
         job_type=user_input.job_type # Pass job_type from the UserInput object
     )
-    GROQ_API_KEY = get_groq_api_key()
+    if variant:
+        prompt += VARIANT_HINT.format(number=variant + 1)
+    return prompt
 
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama3-70b-8192",
-        temperature=0.8 # Increased temperature slightly for more creative message generation
-    )
+def message_cache_key(user_input: UserInput, variant: int = 0) -> str:
+    return template_cache_key(user_input.model_dump_json(), "+".join(get_router().candidates("message")), variant)
+
+def _remember_templates(generated: List[Tuple[UserInput, int, str]]) -> None:
+    """Add new (user_input, variant, template) entries to the template cache and profile store."""
+    cache = get_template_cache()
+    records = []
+    for user_input, variant, template in generated:
+        key = message_cache_key(user_input, variant)
+        cache.set(key, template)
+        records.append(TemplateRecord(key, summary_hash(user_input.summary), user_input.job_type,
+                                      user_input.message_type, variant, template))
+    store = get_profile_store()
+    if store is not None:
+        store.save_templates(records)
+
+def _recall_templates(keys: List[str]) -> Dict[str, str]:
+    """Templates for `keys` from the cache, loading any it lacks from the profile store."""
+    cache = get_template_cache()
+    found = {}
+    for key in keys:
+        template = cache.peek(key)
+        if template is not None:
+            found[key] = template
+    store = get_profile_store()
+    missing = [key for key in keys if key not in found]
+    if missing and store is not None:
+        for key, template in store.get_templates(missing).items():
+            cache.set(key, template)
+            found[key] = template
+    return found
+
+def cached_message_templates(user_input: UserInput) -> List[str]:
+    """Templates already generated for `user_input`, in variant order."""
+    keys = [message_cache_key(user_input, variant) for variant in range(MAX_VARIANTS)]
+    found = _recall_templates(keys)
+    templates = []
+    for key in keys:
+        if key not in found:
+            break
+        templates.append(found[key])
+    return templates
+
+# Background generations still running, by template cache key
+_prefetches = {}
+_prefetch_lock = threading.Lock()
+
+def prefetch_message_template(user_input: UserInput, context: Optional[LLMContext] = None) -> Optional[Future]:
+    """Start generating the template for `user_input` in the background.
+
+    The call is queued behind interactive and upload work and its result
+    goes into the template cache, where a later `generate_message_template`
+    or `stream_message_template` for the same input picks it up.
+
+    Returns:
+        Future: The pending generation (also returned for a repeat call
+            while it runs), or None if the template is already cached.
+    """
+    cache_key = message_cache_key(user_input)
+    with _prefetch_lock:
+        if cache_key in _prefetches:
+            return _prefetches[cache_key]
+        if _recall_templates([cache_key]):
+            return None
+
+        context = resolve_context(context)
+        route = get_router().select("message_prefetch")
+        llm = get_chat_model(model_name=route.model_name, temperature=MESSAGE_TEMPERATURE, api_key=context.api_key)
+        future = get_scheduler().invoke_async(
+            llm, build_message_prompt(user_input), api_key=context.api_key, priority=PRIORITY_BACKGROUND,
+            task="message_prefetch"
+        )
+        _prefetches[cache_key] = future
+
+    def done(future: Future) -> None:
+        with _prefetch_lock:
+            if _prefetches.get(cache_key) is future:
+                del _prefetches[cache_key]
+        if future.cancelled():
+            incr("template_prefetch_total", outcome="cancelled")
+        elif future.exception() is not None:
+            incr("template_prefetch_total", outcome="error")
+        else:
+            _remember_templates([(user_input, 0, future.result().content)])
+            incr("template_prefetch_total", outcome="completed")
+
+    future.add_done_callback(done)
+    return future
+
+def cancel_prefetch(user_input: UserInput) -> bool:
+    """Drop the background generation for `user_input` if it has not started yet."""
+    with _prefetch_lock:
+        future = _prefetches.get(message_cache_key(user_input))
+    return future is not None and future.cancel()
+
+def _take_prefetched(cache_key: str) -> Optional[str]:
+    """Result of a prefetch for `cache_key`, waiting for it if it is already running.
+
+    A prefetch still queued at background priority is cancelled instead, so
+    the caller can make the request at its own priority.
+    """
+    with _prefetch_lock:
+        future = _prefetches.get(cache_key)
+    if future is None or future.cancel():
+        return None
+    try:
+        template = future.result().content
+    except Exception:
+        return None
+    incr("template_prefetch_total", outcome="used")
+    return template
+
+def _lookup_template(cache_key: str, variant: int = 0) -> Optional[str]:
+    """A template generated earlier: cached, stored or being prefetched."""
+    template = get_template_cache().get(cache_key)
+    if template is None:
+        template = _recall_templates([cache_key]).get(cache_key)
+    if template is None and not variant:
+        template = _take_prefetched(cache_key)
+    return template
+
+def generate_message_template(user_input: UserInput, context: Optional[LLMContext] = None, variant: int = 0,
+                              use_cache: bool = True) -> str:
+    template, generated = _generate_message_template(user_input, context, variant, use_cache)
+    if generated:
+        _remember_templates([(user_input, variant, template)])
+    return template
+
+def _generate_message_template(user_input: UserInput, context: Optional[LLMContext], variant: int,
+                               use_cache: bool) -> Tuple[str, bool]:
+    """Returns the template and whether it was newly generated."""
+    if use_cache:
+        cached = _lookup_template(message_cache_key(user_input, variant), variant)
+        if cached is not None:
+            return cached, False
+
+    context = resolve_context(context)
+    prompt_formatted = build_message_prompt(user_input, variant)
 
     # Invoke the LLM
-    response_message = llm.invoke(prompt_formatted)
+    with span("llm.message", message_type=user_input.message_type, variant=variant) as s:
+        response_message = get_router().invoke(
+            "message", prompt_formatted, temperature=MESSAGE_TEMPERATURE, api_key=context.api_key,
+            priority=PRIORITY_INTERACTIVE
+        )
+        record_llm_usage(s, response_message, "message")
 
     # The LLM is instructed to return only the message content
-    return response_message.content
+    return response_message.content, True
+
+def generate_message_variants(user_input: UserInput, message_types: Iterable[str], variants: int = 1,
+                              context: Optional[LLMContext] = None) -> Dict[str, List[str]]:
+    """Generate `variants` templates for each message type concurrently.
+
+    Args:
+        user_input (UserInput): Summary, links and job type; its own
+            message_type is ignored.
+        message_types (iterable of str): Message types to generate.
+        variants (int): Drafts per message type, at most MAX_VARIANTS.
+        context (LLMContext, optional): Session credentials.
+
+    Returns:
+        dict: Message type -> list of templates, in variant order. Cached
+            templates are reused; only the missing ones reach the LLM.
+    """
+    context = resolve_context(context)
+    variants = max(1, min(variants, MAX_VARIANTS))
+    inputs = {message_type: user_input.model_copy(update={"message_type": message_type})
+              for message_type in dict.fromkeys(message_types)}
+    jobs = [(message_type, variant) for message_type in inputs for variant in range(variants)]
+    if not jobs:
+        return {}
+
+    with span("llm.message_variants", types=len(inputs), variants=variants):
+        # The scheduler applies the rate limits; the threads only wait on it
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="message-variant") as pool:
+            futures = {job: pool.submit(_generate_message_template, inputs[job[0]], context, job[1], True)
+                       for job in jobs}
+            results = {job: future.result() for job, future in futures.items()}
+
+    _remember_templates([(inputs[message_type], variant, template)
+                         for (message_type, variant), (template, generated) in results.items() if generated])
+    return {message_type: [results[(message_type, variant)][0] for variant in range(variants)]
+            for message_type in inputs}
+
+def stream_message_template(user_input: UserInput, context: Optional[LLMContext] = None) -> Iterator[str]:
+    """Yield the message template piece by piece as the LLM generates it.
+
+    Joining the yielded strings gives the same result as
+    `generate_message_template`.
+    """
+    cached = _lookup_template(message_cache_key(user_input))
+    if cached is not None:
+        yield cached
+        return
+
+    context = resolve_context(context)
+    prompt_formatted = build_message_prompt(user_input)
+    # Streams have no tier fallback: the first chunks are already on screen
+    route = get_router().select("message")
+    llm = get_chat_model(model_name=route.model_name, temperature=MESSAGE_TEMPERATURE, api_key=context.api_key)
+
+    with span("llm.message_stream", message_type=user_input.message_type, model=route.model_name) as s:
+        started = time.perf_counter()
+        parts = []
+        usage = None
+        for chunk in get_scheduler().stream(llm, prompt_formatted, api_key=context.api_key, task="message"):
+            usage = chunk if getattr(chunk, "usage_metadata", None) else usage
+            if chunk.content:
+                if not parts:
+                    s.set(first_token_ms=round((time.perf_counter() - started) * 1000, 1))
+                parts.append(chunk.content)
+                yield chunk.content
+        s.set(chunks=len(parts))
+        record_llm_usage(s, usage, "message")
+    # Only a stream that ran to completion is cached
+    if parts:
+        _remember_templates([(user_input, 0, "".join(parts))])
 
 # Example Usage (for testing)
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+"""Render one message template for many recipients.
+
+Recipients are streamed row by row from CSV or JSONL and written straight to
+CSV, JSONL or a directory of .eml files, so memory stays flat regardless of
+input size and no LLM is called per row.
+
+    python -m utils.bulk_render --template template.txt --input recipients.csv --output messages.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from email.message import EmailMessage
+from itertools import chain
+from typing import IO, Iterable, Iterator, Optional
+
+from utils.format_message import MissingFieldsError, compile_template
+
+# Alternative column names accepted for the built-in placeholders
+FIELD_ALIASES = {
+    "recipient_name": ("recipient_name", "name", "recipient", "full_name"),
+    "company_name": ("company_name", "company", "organization"),
+}
+
+
+def _detect_format(path: str, default: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("csv", "jsonl", "eml"):
+        return ext
+    if ext == "json" or ext == "ndjson":
+        return "jsonl"
+    return default
+
+
+def read_recipients(stream: IO[str], input_format: str = "csv") -> Iterator[dict]:
+    """Yield recipient rows one at a time from a CSV or JSONL text stream."""
+    if input_format == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(stream)
+
+
+def _with_aliases(row: dict) -> dict:
+    values = {k.strip(): v for k, v in row.items() if k}
+    for field, aliases in FIELD_ALIASES.items():
+        if field not in values:
+            for alias in aliases:
+                if alias in values:
+                    values[field] = values[alias]
+                    break
+    return values
+
+
+def render_rows(template: str, rows: Iterable[dict], strict: bool = True) -> Iterator[dict]:
+    """Yield each row with its rendered `message`.
+
+    With `strict`, the columns of the first row are checked against the
+    template's fields before anything is rendered (raising
+    MissingFieldsError), and rows with an empty field get an `error`
+    instead of a message. Otherwise unfilled placeholders are left as is.
+    """
+    compiled = compile_template(template)
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    if strict:
+        absent = [f for f in compiled.fields if f not in _with_aliases(first)]
+        if absent:
+            raise MissingFieldsError(absent)
+
+    for row in chain([first], rows):
+        values = _with_aliases(row)
+        missing = compiled.missing(values) if strict else []
+        if missing:
+            yield {**row, "message": "", "error": f"missing values for: {', '.join(missing)}"}
+        else:
+            yield {**row, "message": compiled.render(values)}
+
+
+def _split_subject(message: str):
+    first, _, rest = message.partition("\n")
+    if first.lower().startswith("subject:"):
+        return first[len("subject:"):].strip(), rest.lstrip("\n")
+    return "", message
+
+
+class CsvWriter:
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.writer = None
+
+    def write(self, row: dict) -> None:
+        if self.writer is None:
+            fieldnames = list(row) + [f for f in ("error",) if f not in row]
+            self.writer = csv.DictWriter(self.stream, fieldnames=fieldnames, extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+
+class JsonlWriter:
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write(self, row: dict) -> None:
+        self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class EmlWriter:
+    """Writes one .eml file per recipient into `directory`."""
+
+    def __init__(self, directory: str, sender: str = ""):
+        self.directory = directory
+        self.sender = sender
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, row: dict) -> None:
+        self.count += 1
+        if row.get("error"):
+            return
+        subject, body = _split_subject(row["message"])
+        email = EmailMessage()
+        if self.sender:
+            email["From"] = self.sender
+        if row.get("email"):
+            email["To"] = row["email"]
+        email["Subject"] = subject
+        email.set_content(body)
+        with open(os.path.join(self.directory, f"{self.count:06d}.eml"), "wb") as f:
+            f.write(bytes(email))
+
+
+def bulk_render(template: str, rows: Iterable[dict], writer, strict: bool = True) -> dict:
+    """Render `template` for every row into `writer`; returns row/error counts.
+
+    Raises:
+        MissingFieldsError: If `strict` and the input lacks a column for a template field.
+    """
+    stats = {"rows": 0, "errors": 0}
+    for rendered in render_rows(template, rows, strict):
+        stats["rows"] += 1
+        stats["errors"] += bool(rendered.get("error"))
+        writer.write(rendered)
+    return stats
+
+
+def render_to_string(template: str, stream: IO[str], input_format: str = "csv", output_format: str = "csv",
+                     strict: bool = True):
+    """Render into an in-memory CSV/JSONL string (used by the Streamlit upload)."""
+    output = io.StringIO()
+    writer = JsonlWriter(output) if output_format == "jsonl" else CsvWriter(output)
+    stats = bulk_render(template, read_recipients(stream, input_format), writer, strict)
+    return output.getvalue(), stats
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--template", required=True, help="file containing the message template")
+    parser.add_argument("--input", required=True, help="recipients as .csv or .jsonl ('-' for stdin)")
+    parser.add_argument("--output", required=True, help="output .csv/.jsonl file, or a directory for .eml")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"))
+    parser.add_argument("--output-format", choices=("csv", "jsonl", "eml"))
+    parser.add_argument("--sender", default="", help="From address for .eml output")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="leave placeholders without a column/value unfilled instead of failing")
+    args = parser.parse_args(argv)
+
+    with open(args.template, "r", encoding="utf-8") as f:
+        template = f.read()
+    input_format = args.input_format or _detect_format(args.input, "csv")
+    output_format = args.output_format or _detect_format(args.output, "eml")
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8-sig", newline="")
+    try:
+        rows = read_recipients(source, input_format)
+        if output_format == "eml":
+            stats = bulk_render(template, rows, EmlWriter(args.output, args.sender), not args.allow_missing)
+        else:
+            with open(args.output, "w", encoding="utf-8", newline="") as out:
+                writer = JsonlWriter(out) if output_format == "jsonl" else CsvWriter(out)
+                stats = bulk_render(template, rows, writer, not args.allow_missing)
+    except MissingFieldsError as e:
+        print(f"Recipient list has no column for the template fields: {', '.join(e.missing)}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(f"Rendered {stats['rows'] - stats['errors']} messages ({stats['errors']} rows with missing fields).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
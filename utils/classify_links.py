@@ -1,16 +1,17 @@
-from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain_groq import ChatGroq
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Sequence
+from urllib.parse import urlparse
 from models.schema import LinkMap
-from utils.config import get_groq_api_key
+from utils.config import LLMContext, get_link_llm_fallback, resolve_context
+from utils.json_repair import compact_schema, parse_json_model
+from utils.model_router import get_router
+from utils.scheduler import PRIORITY_UPLOAD
+from utils.tracing import record_llm_usage, span
 
 
-# Create parser for Pydantic output
-parser = PydanticOutputParser(pydantic_object=LinkMap)
-
-# Prompt template with format instructions injected
-link_prompt = PromptTemplate(
-    template="""You are an assistant that classifies URLs by platform.
+LINK_PROMPT = """You are an assistant that classifies URLs by platform.
 Given this list of URLs, return a JSON object mapping platforms like LinkedIn, GitHub, Portfolio, Twitter, or Website to their full URLs.
 
 If a platform is missing, use null for that key.
@@ -18,27 +19,124 @@ If a platform is missing, use null for that key.
 Links:
 {links}
 
+Return ONLY a JSON object of this shape:
 {format_instructions}
-""",
-    input_variables=["links"],
-    partial_variables={"format_instructions": parser.get_format_instructions()}
-)
+"""
 
-def classify_links_with_llm(link_list: list[str]) -> dict:
-    
-    GROQ_API_KEY = get_groq_api_key()
+# Prompt template with format instructions injected (lazily, like the others)
+@lru_cache(maxsize=None)
+def get_link_prompt():
+    from langchain_core.prompts import PromptTemplate
 
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,   # Replace with your actual API key or use env var
-        model_name="llama3-70b-8192",       # Groq's LLaMA3 model
-        temperature=1
+    return PromptTemplate(
+        template=LINK_PROMPT,
+        input_variables=["links"],
+        partial_variables={"format_instructions": compact_schema(LinkMap)}
     )
+
+def classify_links_with_llm(link_list: list[str], context: Optional[LLMContext] = None) -> dict:
+    context = resolve_context(context)
     formatted_links = "\\n".join(link_list)
-    prompt = link_prompt.format(links=formatted_links)
-    response = llm.invoke(prompt)
+    prompt = get_link_prompt().format(links=formatted_links)
+    with span("llm.classify_links", links=len(link_list)) as s:
+        # Routed to the small tier: picking platforms out of a few URLs needs no 70B model
+        response = get_router().invoke(
+            "classify_links", prompt, temperature=1, api_key=context.api_key, priority=PRIORITY_UPLOAD
+        )
+        record_llm_usage(s, response, "classify_links")
     try:
-        return parser.parse(response.content).model_dump()
-    except Exception as e:
+        return parse_json_model(response.content, LinkMap, task="classify_links").model_dump()
+    except ValueError as e:
         print("Parsing error:", e)
         return {}
-    
\ No newline at end of file
+
+
+@dataclass(frozen=True)
+class LinkRule:
+    """Maps URLs on `domains` (and optionally matching `path`) to a LinkMap field."""
+    field: str
+    domains: tuple
+    path: Optional[str] = None
+
+    def matches(self, host: str, path: str) -> bool:
+        if not any(host == d or host.endswith("." + d) for d in self.domains):
+            return False
+        return self.path is None or re.search(self.path, path) is not None
+
+
+# Earlier rules win, so profile-shaped URLs are listed before catch-alls
+DEFAULT_LINK_RULES = (
+    LinkRule("linkedin", ("linkedin.com",), r"^/in/[^/]+/?$"),
+    LinkRule("linkedin", ("linkedin.com",)),
+    LinkRule("github", ("github.com",), r"^/[^/]+/?$"),
+    LinkRule("github", ("github.com",)),
+    LinkRule("blog", ("medium.com", "dev.to", "hashnode.dev", "hashnode.com", "substack.com",
+                      "blogspot.com", "wordpress.com", "ghost.io")),
+    LinkRule("portfolio", ("github.io", "vercel.app", "netlify.app", "pages.dev", "web.app",
+                           "herokuapp.com", "framer.website", "carrd.co", "about.me")),
+)
+
+
+def _normalize_url(url: str) -> str:
+    url = url.strip()
+    if url and "://" not in url and not url.startswith(("mailto:", "tel:")):
+        url = "https://" + url
+    return url
+
+
+def classify_link(url: str, rules: Sequence[LinkRule] = DEFAULT_LINK_RULES) -> Optional[tuple]:
+    """Return (rule index, field) for the first rule matching `url`, or None."""
+    parsed = urlparse(_normalize_url(url))
+    if parsed.scheme not in ("http", "https"):
+        return None
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    for index, rule in enumerate(rules):
+        if rule.matches(host, parsed.path):
+            return index, rule.field
+    return None
+
+
+def classify_links(link_list: list[str], rules: Sequence[LinkRule] = DEFAULT_LINK_RULES,
+                   use_llm: Optional[bool] = None, context: Optional[LLMContext] = None) -> dict:
+    """Fill a LinkMap from `link_list` using local domain rules.
+
+    Only URLs no rule recognises are sent to the LLM, and only while some
+    LinkMap field is still empty. Pass `use_llm=False` (or set
+    LINK_LLM_FALLBACK=0) to never call the LLM.
+    """
+    if use_llm is None:
+        use_llm = get_link_llm_fallback()
+
+    with span("links.classify", links=len(link_list)) as s:
+        result = _classify_links(link_list, rules, use_llm, context, s)
+    return result
+
+
+def _classify_links(link_list, rules, use_llm, context, s) -> dict:
+    best = {}
+    unknown = []
+    for url in dict.fromkeys(u.strip() for u in link_list if u and u.strip()):
+        match = classify_link(url, rules)
+        if match is None:
+            if urlparse(_normalize_url(url)).scheme in ("http", "https"):
+                unknown.append(url)
+            continue
+        index, field = match
+        if field not in best or index < best[field][0]:
+            best[field] = (index, _normalize_url(url))
+
+    result = {field: url for field, (index, url) in best.items()}
+    missing = [name for name in LinkMap.model_fields if name not in result]
+    s.set(local=len(result), unknown=len(unknown), llm_called=bool(use_llm and unknown and missing))
+    if use_llm and unknown and missing:
+        for field, url in classify_links_with_llm(unknown, context).items():
+            if field in missing and url:
+                result[field] = str(url)
+
+    try:
+        return LinkMap(**result).model_dump(mode="json")
+    except Exception as e:
+        print("Link validation error:", e)
+        return {}
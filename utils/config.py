@@ -1,7 +1,189 @@
 import os
+from dataclasses import dataclass, field
+from typing import Optional
 
 def set_groq_api_key(key: str):
     os.environ["GROQ_API_KEY"] = key
 
 def get_groq_api_key() -> str:
-    return os.getenv("GROQ_API_KEY", "")
\ No newline at end of file
+    return os.getenv("GROQ_API_KEY", "")
+
+
+@dataclass(frozen=True)
+class LLMContext:
+    """Credentials for one user session.
+
+    Passed explicitly through the chains instead of living in os.environ, so
+    concurrent Streamlit sessions in one process never see each other's key.
+    """
+    api_key: str = field(default="", repr=False)
+
+    @classmethod
+    def from_env(cls) -> "LLMContext":
+        return cls(api_key=get_groq_api_key())
+
+
+def resolve_context(context: Optional[LLMContext]) -> LLMContext:
+    """The given context, or one built from GROQ_API_KEY for scripts and the CLI."""
+    return context if context is not None else LLMContext.from_env()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Resume summary cache (see utils/summary_cache.py)
+def get_summary_cache_dir() -> str:
+    return os.getenv("SUMMARY_CACHE_DIR", os.path.join(".cache", "summaries"))
+
+def get_summary_cache_max_entries() -> int:
+    return _env_int("SUMMARY_CACHE_MAX_ENTRIES", 500)
+
+def get_summary_cache_ttl() -> int:
+    """TTL in seconds; 0 disables expiry."""
+    return _env_int("SUMMARY_CACHE_TTL", 7 * 24 * 3600)
+
+
+# PDF extraction worker pool (see utils/pdf_worker.py)
+def get_pdf_workers() -> int:
+    """Number of worker processes; 0 parses inline in the calling thread."""
+    return _env_int("PDF_WORKERS", 2)
+
+def get_pdf_timeout() -> int:
+    return _env_int("PDF_TIMEOUT", 30)
+
+def get_pdf_max_pages() -> int:
+    return _env_int("PDF_MAX_PAGES", 20)
+
+def get_pdf_max_bytes() -> int:
+    return _env_int("PDF_MAX_BYTES", 10 * 1024 * 1024)
+
+
+# Link classification (see utils/classify_links.py)
+def get_link_llm_fallback() -> bool:
+    """Whether links the local rules cannot place are sent to the LLM."""
+    return os.getenv("LINK_LLM_FALLBACK", "1").lower() not in ("0", "false", "no")
+
+
+# Resume preprocessing (see utils/resume_sections.py)
+def get_resume_token_budget() -> int:
+    """Max resume tokens per summarization prompt; 0 disables the budget."""
+    return _env_int("RESUME_TOKEN_BUDGET", 3000)
+
+def get_resume_parallel_sections() -> bool:
+    """Summarize over-budget resumes as parallel section chunks instead of truncating."""
+    return os.getenv("RESUME_PARALLEL_SECTIONS", "0").lower() in ("1", "true", "yes")
+
+def get_resume_incremental_max_change() -> float:
+    """Largest share of changed resume tokens re-summarized incrementally; 0 disables."""
+    try:
+        return float(os.getenv("RESUME_INCREMENTAL_MAX_CHANGE", 0.5))
+    except ValueError:
+        return 0.5
+
+
+# Tracing (see utils/tracing.py)
+def get_trace_jsonl_path() -> str:
+    """File that finished spans are appended to as JSON lines; empty disables."""
+    return os.getenv("TRACE_JSONL", "")
+
+
+# LLM backend (see utils/llm_client.py and utils/fake_llm.py)
+def get_llm_backend() -> str:
+    """"groq" for the real API, "fake" for the offline stand-in model."""
+    return os.getenv("LLM_BACKEND", "groq").lower()
+
+def get_fake_llm_latency() -> float:
+    try:
+        return float(os.getenv("FAKE_LLM_LATENCY", 0.5))
+    except ValueError:
+        return 0.5
+
+def get_fake_llm_tokens_per_second() -> float:
+    try:
+        return float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", 200))
+    except ValueError:
+        return 200.0
+
+
+# LLM request scheduler (see utils/scheduler.py)
+def get_llm_requests_per_minute() -> int:
+    """Per API key; 0 disables the limit."""
+    return _env_int("LLM_REQUESTS_PER_MINUTE", 30)
+
+def get_llm_tokens_per_minute() -> int:
+    """Per API key; 0 disables the limit."""
+    return _env_int("LLM_TOKENS_PER_MINUTE", 30000)
+
+def get_llm_max_retries() -> int:
+    return _env_int("LLM_MAX_RETRIES", 4)
+
+def get_llm_scheduler_workers() -> int:
+    return _env_int("LLM_SCHEDULER_WORKERS", 8)
+
+
+# Model tiers and per-task routing (see utils/model_router.py)
+def get_small_model() -> str:
+    return os.getenv("LLM_SMALL_MODEL", "llama-3.1-8b-instant")
+
+def get_large_model() -> str:
+    return os.getenv("LLM_LARGE_MODEL", "llama3-70b-8192")
+
+def get_route_tier(task: str, default: str) -> str:
+    """"small", "large" or "auto" (by input size) for `task`, from ROUTE_<TASK>_TIER."""
+    return os.getenv(f"ROUTE_{task.upper()}_TIER", default).lower()
+
+def get_route_budget(task: str, default: float) -> float:
+    """Seconds to wait on `task`'s model before also asking the other tier; 0 waits indefinitely."""
+    try:
+        return float(os.getenv(f"ROUTE_{task.upper()}_BUDGET", default))
+    except ValueError:
+        return default
+
+def get_route_small_max_tokens() -> int:
+    """Largest input, in tokens, that "auto" tasks send to the small model."""
+    return _env_int("ROUTE_SMALL_MAX_TOKENS", 1500)
+
+
+# Generated message templates (see utils/template_cache.py)
+def get_template_cache_max_entries() -> int:
+    return _env_int("TEMPLATE_CACHE_MAX_ENTRIES", 256)
+
+def get_template_prefetch() -> bool:
+    """Whether the app generates the likely template in the background by default."""
+    return os.getenv("TEMPLATE_PREFETCH", "0").lower() in ("1", "true", "yes")
+
+
+# Headless HTTP API (see api/server.py)
+def get_api_workers() -> int:
+    """Threads running blocking pipeline calls for API requests."""
+    return _env_int("API_WORKERS", 8)
+
+def get_api_max_pending() -> int:
+    """Requests allowed in flight before the API answers 503."""
+    return _env_int("API_MAX_PENDING", 64)
+
+def get_api_timeout() -> int:
+    """Seconds a request may take before the API answers 504."""
+    return _env_int("API_TIMEOUT", 120)
+
+
+# Background jobs (see utils/jobs.py)
+def get_job_workers() -> int:
+    """Uploads processed at the same time across all sessions."""
+    return _env_int("JOB_WORKERS", 4)
+
+
+# Persistent profiles and templates (see utils/profile_store.py)
+def get_profile_store_path() -> str:
+    """SQLite file for parsed resumes and templates; empty disables the store."""
+    return os.getenv("PROFILE_STORE_PATH", os.path.join(".cache", "profiles.sqlite3"))
+
+def get_profile_store_max_profiles() -> int:
+    return _env_int("PROFILE_STORE_MAX_PROFILES", 1000)
+
+def get_profile_store_max_templates() -> int:
+    return _env_int("PROFILE_STORE_MAX_TEMPLATES", 10000)
@@ -1,38 +1,132 @@
-from pdfminer.high_level import extract_text as extract_pdf_text
-import PyPDF2
-from utils.classify_links import classify_links_with_llm
+import time
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import List, Optional, Tuple
+
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from utils.classify_links import classify_links
+from utils.pdf_worker import PdfTimeoutError, get_pdf_extractor
+
+
+@dataclass
+class PdfLink:
+    uri: str
+    page: int
+    rect: Optional[Tuple[float, float, float, float]] = None
+
+
+@dataclass
+class PdfPage:
+    number: int
+    text: str
+    links: List[PdfLink] = field(default_factory=list)
+
+
+@dataclass
+class ParsedPdf:
+    pages: List[PdfPage] = field(default_factory=list)
+    cpu_ms: float = 0.0
+
+    @property
+    def text(self) -> str:
+        # Same layout as pdfminer's extract_text: every page ends with a form feed
+        return "".join(page.text for page in self.pages)
+
+    @property
+    def links(self) -> List[str]:
+        return [link.uri for page in self.pages for link in page.links]
+
+
+def _decode(value) -> str:
+    value = resolve1(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return str(value) if value is not None else ""
+
+
+def _page_links(page, page_number: int) -> List[PdfLink]:
+    links = []
+    annots = resolve1(page.annots) if page.annots else []
+    for annot in annots or []:
+        annot = resolve1(annot)
+        if not isinstance(annot, dict):
+            continue
+        action = resolve1(annot.get("A"))
+        if not isinstance(action, dict) or "URI" not in action:
+            continue
+        rect = resolve1(annot.get("Rect"))
+        try:
+            rect = tuple(float(resolve1(v)) for v in rect) if rect else None
+        except (TypeError, ValueError):
+            rect = None
+        links.append(PdfLink(uri=_decode(action["URI"]), page=page_number, rect=rect))
+    return links
+
+
+def parse_pdf(file, maxpages: int = 0, timeout: Optional[float] = None) -> ParsedPdf:
+    """Parse a PDF once, collecting per-page text and link annotations.
+
+    Args:
+        file: A binary file-like object (e.g. a Streamlit UploadedFile).
+        maxpages (int, optional): Stop after this many pages; 0 reads all.
+        timeout (float, optional): Give up between pages once this many
+            seconds have passed.
+
+    Returns:
+        ParsedPdf: Page text and `/Annots` URIs with their page and position.
+    """
+    file.seek(0)
+    document = PDFDocument(PDFParser(file))
+    resource_manager = PDFResourceManager()
+    output = StringIO()
+    converter = TextConverter(resource_manager, output, laparams=LAParams())
+    interpreter = PDFPageInterpreter(resource_manager, converter)
+
+    deadline = time.monotonic() + timeout if timeout else None
+    parsed = ParsedPdf()
+    try:
+        for page_number, page in enumerate(PDFPage.create_pages(document), start=1):
+            if maxpages and page_number > maxpages:
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                raise PdfTimeoutError(f"PDF extraction took longer than {timeout} seconds.")
+            start = output.tell()
+            interpreter.process_page(page)
+            output.seek(start)
+            page_text = output.read()
+            parsed.pages.append(PdfPage(
+                number=page_number,
+                text=page_text,
+                links=_page_links(page, page_number),
+            ))
+    finally:
+        converter.close()
+    return parsed
 
 
 def extact_text(file):
     text = ""
     if file.name.endswith(".pdf"):
-        text = extract_pdf_text(file)
+        text = parse_pdf(file).text
     return text
-    
-    
+
+
 def extract_links(file):
-    links = []
-    PDF = PyPDF2.PdfReader(file)
-    pages = len(PDF.pages) 
-    key = '/Annots'
-    uri = '/URI'
-    ank = '/A'
-
-    for page_num in range(pages):
-        pageObject = PDF.pages[page_num] 
-        if key in pageObject: 
-            ann = pageObject[key]
-            for a in ann:
-                u = a.get_object() 
-                if ank in u and uri in u[ank]:
-                    links.append(u[ank][uri])
-
-    extracted_links = classify_links_with_llm(links)
+    links = parse_pdf(file).links
+    extracted_links = classify_links(links)
     return extracted_links
-    
-    
+
+
 def extract_text_and_links(file):
-    extracted_text = extact_text(file)
-    extracted_links = extract_links(file)
-    
-    return extracted_text, extracted_links
\ No newline at end of file
+    # Parsing runs in the PDF worker pool; raises PdfLimitError / PdfTimeoutError / PdfWorkerError
+    parsed = get_pdf_extractor().extract(file)
+    extracted_text = parsed.text if file.name.endswith(".pdf") else ""
+    extracted_links = classify_links(parsed.links)
+
+    return extracted_text, extracted_links
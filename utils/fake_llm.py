@@ -0,0 +1,156 @@
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+FAKE_SUMMARY = {
+    "full_name": "Jane Doe",
+    "contact_info": {"email": "jane.doe@example.com", "phone": None, "location": "Remote",
+                     "linkedin": "https://linkedin.com/in/janedoe", "github": "https://github.com/janedoe",
+                     "portfolio": None},
+    "professional_summary": "Software engineer with 4 years of experience building Python services and React frontends.",
+    "technical_skills": ["Python", "FastAPI", "React", "PostgreSQL", "Docker", "AWS"],
+    "soft_skills": ["Communication", "Mentoring"],
+    "work_experience": [{"job_title": "Software Engineer", "company": "Acme", "duration": "2021 - Present",
+                         "key_responsibilities": ["Built REST APIs serving 1M requests per day",
+                                                  "Cut deployment time by 60% with CI/CD"]}],
+    "total_experience": "4 years",
+    "education": [{"degree": "B.Sc. Computer Science", "institution": "State University", "year": "2020"}],
+    "notable_projects": [{"name": "Resume Parser", "description": "PDF parsing pipeline", "technologies": ["Python"]}],
+    "certifications": [],
+    "achievements": ["Hackathon winner 2022"],
+    "target_roles": ["Backend Engineer"],
+    "career_level": "Mid Level",
+}
+
+FAKE_TEMPLATE = """Subject: Exploring opportunities at {company_name}
+
+Hi {recipient_name},
+
+I am a software engineer with 4 years of experience building Python services and React frontends. I would love to learn more about the team at {company_name} and whether my background could be a fit.
+
+Thank you for your time.
+
+Best regards,
+Jane Doe
+
+- LinkedIn: https://linkedin.com/in/janedoe
+- GitHub: https://github.com/janedoe"""
+
+
+def default_fake_response(prompt: str) -> str:
+    """Plausible canned output for each of the app's prompts."""
+    if "expert resume parser" in prompt:
+        return json.dumps(FAKE_SUMMARY)
+    if "classifies URLs" in prompt:
+        links = re.findall(r"https?://\S+", prompt.split("Links:", 1)[-1])
+        return json.dumps({"portfolio": links[0] if links else None})
+    return FAKE_TEMPLATE
+
+
+class FakeRateLimitError(Exception):
+    """Raised by FakeChatModel to mimic a Groq 429 response."""
+
+    status_code = 429
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline stand-in for ChatGroq with configurable latency and token rate.
+
+    `latency` is the time to first token in seconds and `tokens_per_second`
+    paces the rest of the reply (0 means instant). Replies come from
+    `response`, either a fixed string or a callable given the prompt text.
+    A `failure_rate` fraction of calls raise FakeRateLimitError after the
+    latency, for exercising retries.
+    """
+
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    failure_rate: float = 0.0
+    response: Union[str, Callable[[str], str]] = default_fake_response
+    model_name: str = "fake-model"
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise FakeRateLimitError("Rate limit reached (fake)")
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(m.content) for m in messages)
+        return self.response(prompt) if callable(self.response) else self.response
+
+    def _pieces(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> dict:
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = len(text) // 4
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        time.sleep(self.latency)
+        self._maybe_fail()
+        if self.tokens_per_second:
+            time.sleep(len(self._pieces(text)) / self.tokens_per_second)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._reply(messages)
+        time.sleep(self.latency)
+        self._maybe_fail()
+        for piece in self._pieces(text):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        if self.tokens_per_second:
+            await asyncio.sleep(len(self._pieces(text)) / self.tokens_per_second)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._reply(messages)
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        for piece in self._pieces(text):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+def fake_model_factory(latency: float = 0.0, tokens_per_second: float = 0.0, failure_rate: float = 0.0,
+                       response: Union[str, Callable[[str], str]] = default_fake_response,
+                       latencies: Optional[Dict[str, float]] = None):
+    """ModelFactory for LLMClientRegistry that builds FakeChatModels.
+
+    `latencies` overrides `latency` per model name, e.g. to make the large
+    tier slow enough to trigger the model router's fallback.
+    """
+    def factory(api_key: str, model_name: str, temperature: float) -> FakeChatModel:
+        return FakeChatModel(latency=(latencies or {}).get(model_name, latency), tokens_per_second=tokens_per_second,
+                             failure_rate=failure_rate, response=response, model_name=model_name,
+                             temperature=temperature)
+    return factory
@@ -1,2 +1,79 @@
-def format_message_with_placeholders(template: str, name: str, company: str) -> str:
-    return template.format(recipient_name=name, company_name=company)
\ No newline at end of file
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+# `{field}` or `{{ field }}` with an identifier inside; any other brace is literal text
+_PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class MissingFieldsError(ValueError):
+    """Values were not supplied for some required template fields."""
+
+    def __init__(self, missing: Iterable[str]):
+        self.missing = list(missing)
+        super().__init__(f"Missing values for: {', '.join(self.missing)}")
+
+
+class CompiledTemplate:
+    """A message template parsed once into literal segments and field slots.
+
+    Placeholders are `{name}` or `{{name}}` where name is an identifier;
+    stray braces, JSON and code snippets pass through untouched. Rendering
+    fills the slots and joins the segments, with no re-parsing.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._parts = []
+        self._slots = []  # (index into _parts, field name)
+        position = 0
+        for match in _PLACEHOLDER.finditer(template):
+            if match.start() > position:
+                self._parts.append(template[position:match.start()])
+            self._slots.append((len(self._parts), match.group(1) or match.group(2)))
+            self._parts.append(match.group(0))
+            position = match.end()
+        if position < len(template):
+            self._parts.append(template[position:])
+        self.fields = tuple(dict.fromkeys(name for _, name in self._slots))
+
+    def missing(self, values: dict, required: Optional[Iterable[str]] = None) -> list:
+        required = self.fields if required is None else required
+        return [name for name in required if values.get(name) in (None, "")]
+
+    def validate(self, values: dict, required: Optional[Iterable[str]] = None) -> None:
+        """Raise MissingFieldsError unless every required field has a value.
+
+        Args:
+            values (dict): Field values to check.
+            required (iterable, optional): Fields that must be filled;
+                defaults to every field in the template.
+        """
+        missing = self.missing(values, required)
+        if missing:
+            raise MissingFieldsError(missing)
+
+    def render(self, values: dict, strict: bool = False) -> str:
+        """Fill the placeholders from `values`.
+
+        Fields without a value keep their placeholder text, unless `strict`
+        is set, in which case MissingFieldsError is raised.
+        """
+        if strict:
+            self.validate(values)
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            value = values.get(name)
+            if value is not None:
+                parts[index] = str(value)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> CompiledTemplate:
+    return CompiledTemplate(template)
+
+
+def format_message_with_placeholders(template: str, name: str, company: str, **fields) -> str:
+    values = {"recipient_name": name, "company_name": company, **fields}
+    return compile_template(template).render(values)
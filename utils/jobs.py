@@ -0,0 +1,95 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from utils.config import get_job_workers
+from utils.tracing import incr
+
+# Receives the job's `report(stage, completed, total)` progress callback
+JobTarget = Callable[[Callable[[str, int, int], None]], object]
+
+
+class Job:
+    """Handle for work running in the background.
+
+    Safe to keep in Streamlit session state: reruns poll `status` and
+    `progress` and collect `result()` once it is done, so nothing is
+    recomputed.
+    """
+
+    def __init__(self, future: Future):
+        self.id = uuid.uuid4().hex
+        self.future = future
+        self.started = time.time()
+        self.stage: Optional[str] = None
+        self.completed = 0
+        self.total = 0
+
+    def report(self, stage: str, completed: int, total: int) -> None:
+        self.stage, self.completed, self.total = stage, completed, total
+
+    @property
+    def progress(self) -> float:
+        return self.completed / self.total if self.total else 0.0
+
+    @property
+    def status(self) -> str:
+        if self.future.cancelled():
+            return "cancelled"
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.future.exception() is not None else "done"
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self) -> bool:
+        """Drop the job if it has not started; a running job finishes but its result can be ignored."""
+        return self.future.cancel()
+
+    def result(self, timeout: Optional[float] = None):
+        """The target's return value; re-raises its exception."""
+        return self.future.result(timeout=timeout)
+
+
+class JobRunner:
+    """Bounded thread pool for work that should not block a Streamlit rerun."""
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    def submit(self, target: JobTarget, name: str = "job") -> Job:
+        future = Future()
+        job = Job(future)
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                incr("jobs_total", name=name, status="cancelled")
+                return
+            try:
+                future.set_result(target(job.report))
+                incr("jobs_total", name=name, status="done")
+            except BaseException as e:
+                future.set_exception(e)
+                incr("jobs_total", name=name, status="failed")
+
+        self._executor.submit(run)
+        return job
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_default_runner: Optional[JobRunner] = None
+_default_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """The runner for upload jobs, capped at JOB_WORKERS; a job outlives the script run that submitted it."""
+    global _default_runner
+    with _default_runner_lock:
+        if _default_runner is None:
+            _default_runner = JobRunner(max_workers=get_job_workers())
+        return _default_runner
@@ -0,0 +1,159 @@
+import json
+import re
+import types
+import typing
+from typing import Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from utils.tracing import incr
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_PYTHON_LITERALS = {"None": "null", "True": "true", "False": "false"}
+# `X | Y` annotations (Python 3.10+); the README still supports 3.9
+_UNION_TYPES = tuple(t for t in (typing.Union, getattr(types, "UnionType", None)) if t is not None)
+
+
+def _type_sketch(annotation) -> str:
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in _UNION_TYPES:
+        options = [a for a in args if a is not type(None)]
+        sketch = " | ".join(_type_sketch(a) for a in options)
+        return f"{sketch} | null" if len(options) < len(args) else sketch
+    if origin is list:
+        return f"[{_type_sketch(args[0]) if args else 'any'}]"
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return compact_schema(annotation)
+    if annotation is str:
+        return "string"
+    if annotation in (int, float):
+        return "number"
+    if annotation is bool:
+        return "boolean"
+    name = getattr(annotation, "__name__", str(annotation))
+    return "url" if "Url" in name else "string"
+
+
+def compact_schema(model: Type[BaseModel]) -> str:
+    """One-line JSON shape of `model`, e.g. `{"name": string, "tags": [string]}`.
+
+    A fraction of the tokens of PydanticOutputParser's format instructions,
+    which embed the full JSON schema with titles and descriptions.
+    """
+    fields = ", ".join(f'"{name}": {_type_sketch(field.annotation)}' for name, field in model.model_fields.items())
+    return "{" + fields + "}"
+
+
+def _strip_outside_strings(text: str) -> str:
+    """Drop comments, trailing commas and Python literals outside JSON strings."""
+    out = []
+    i, n = 0, len(text)
+    in_string = False
+    while i < n:
+        c = text[i]
+        if in_string:
+            out.append(c)
+            if c == "\\" and i + 1 < n:
+                out.append(text[i + 1])
+                i += 1
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+            out.append(c)
+        elif text.startswith("//", i) or c == "#":
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        elif c == ",":
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j < n and text[j] in "}]":
+                i += 1
+                continue
+            out.append(c)
+        elif c.isalpha():
+            j = i
+            while j < n and text[j].isalnum():
+                j += 1
+            word = text[i:j]
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def extract_json_object(text: str) -> str:
+    """The first balanced `{...}` in `text`, ignoring braces inside strings.
+
+    Code fences and any prose around the object are dropped. An object cut
+    off at the end of the reply is closed.
+    """
+    fenced = _FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in the reply.")
+
+    closers = []
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            closers.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if closers:
+                closers.pop()
+            if not closers:
+                return text[start:i + 1]
+    # Truncated reply: close the open string and brackets
+    return text[start:] + ('"' if in_string else "") + "".join(reversed(closers))
+
+
+def repair_json(text: str) -> str:
+    """Best-effort fix of a near-valid JSON reply into parseable JSON text."""
+    return _strip_outside_strings(extract_json_object(text))
+
+
+def parse_json_model(text: str, model: Type[ModelT], task: str = "llm") -> ModelT:
+    """Validate an LLM reply as `model`, repairing it locally if needed.
+
+    Fenced, commented, trailing-comma or prose-wrapped JSON is fixed here
+    instead of costing another LLM round trip. Repairs are counted in
+    `llm_json_repaired_total` and failures in `llm_json_failed_total`.
+
+    Raises:
+        ValueError: If the reply cannot be repaired into a valid `model`
+            (pydantic's ValidationError is a ValueError).
+    """
+    try:
+        return model.model_validate_json(text)
+    except ValidationError as first_error:
+        try:
+            repaired = model.model_validate(json.loads(repair_json(text)))
+        except ValueError:
+            incr("llm_json_failed_total", task=task)
+            raise first_error
+    incr("llm_json_repaired_total", task=task)
+    return repaired
@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Tuple
+
+from utils.config import (
+    get_fake_llm_latency,
+    get_fake_llm_tokens_per_second,
+    get_groq_api_key,
+    get_llm_backend,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+
+# (api_key, model_name, temperature) -> chat model
+ModelFactory = Callable[[str, str, float], object]
+
+
+_http_client: Optional["httpx.Client"] = None
+_http_client_lock = threading.Lock()
+
+
+def _shared_http_client() -> "httpx.Client":
+    """One keep-alive connection pool shared by every Groq client."""
+    global _http_client
+    import httpx
+
+    with _http_client_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120),
+            )
+        return _http_client
+
+
+def groq_model_factory(api_key: str, model_name: str, temperature: float):
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        groq_api_key=api_key,
+        model_name=model_name,
+        temperature=temperature,
+        http_client=_shared_http_client(),
+    )
+
+
+class LLMClientRegistry:
+    """Process-wide cache of chat models keyed by (api key, model, temperature).
+
+    Reusing a model reuses its HTTP connection pool, so repeated calls skip
+    the TLS handshake and client setup. Swap the factory to run against a
+    local fake model.
+    """
+
+    def __init__(self, factory: ModelFactory = groq_model_factory, max_idle_seconds: float = 600):
+        self.factory = factory
+        self.max_idle_seconds = max_idle_seconds
+        self._clients = {}
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str, model_name: str, temperature: float):
+        key = (api_key, model_name, float(temperature))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self.factory(api_key, model_name, temperature)
+                self._clients[key] = client
+            self._last_used[key] = time.monotonic()
+            return client
+
+    def warm(self, api_key: str, models: Iterable[Tuple[str, float]]) -> None:
+        """Build clients ahead of the first request that needs them."""
+        for model_name, temperature in models:
+            self.get(api_key, model_name, temperature)
+
+    def close_idle(self, max_idle_seconds: Optional[float] = None) -> int:
+        """Drop clients unused for longer than `max_idle_seconds`."""
+        limit = self.max_idle_seconds if max_idle_seconds is None else max_idle_seconds
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, used in self._last_used.items() if now - used > limit]
+            for key in idle:
+                self._clients.pop(key, None)
+                self._last_used.pop(key, None)
+        return len(idle)
+
+    def set_factory(self, factory: ModelFactory) -> None:
+        """Replace the model factory (e.g. with a fake) and drop cached clients."""
+        with self._lock:
+            self.factory = factory
+            self._clients.clear()
+            self._last_used.clear()
+
+    def close_all(self) -> None:
+        global _http_client
+        with self._lock:
+            self._clients.clear()
+            self._last_used.clear()
+        with _http_client_lock:
+            if _http_client is not None:
+                _http_client.close()
+                _http_client = None
+
+
+def default_model_factory() -> ModelFactory:
+    """Factory selected by LLM_BACKEND ("groq" or the offline "fake")."""
+    if get_llm_backend() == "fake":
+        from utils.fake_llm import fake_model_factory
+
+        return fake_model_factory(get_fake_llm_latency(), get_fake_llm_tokens_per_second())
+    return groq_model_factory
+
+
+_registry = LLMClientRegistry(default_model_factory())
+
+
+def get_registry() -> LLMClientRegistry:
+    return _registry
+
+
+def get_chat_model(model_name: str, temperature: float, api_key: Optional[str] = None):
+    """Shared chat model for `model_name` at `temperature`.
+
+    Raises:
+        ValueError: If no API key is given or configured.
+    """
+    api_key = api_key if api_key is not None else get_groq_api_key()
+    if not api_key:
+        raise ValueError("GROQ_API_KEY is not set.")
+    _registry.close_idle()
+    return _registry.get(api_key, model_name, temperature)
@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from utils.config import (
+    get_large_model,
+    get_route_budget,
+    get_route_small_max_tokens,
+    get_route_tier,
+    get_small_model,
+)
+from utils.llm_client import get_chat_model
+from utils.scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from utils.tracing import incr, span
+
+SMALL = "small"
+LARGE = "large"
+AUTO = "auto"
+
+# How often a queued call is checked for having been sent
+_START_POLL = 0.05
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """How one task picks its model tier.
+
+    `tier` is "small", "large" or "auto"; auto sends inputs of up to
+    `small_max_tokens` to the small tier and anything longer to the large
+    one. A call that takes longer than `budget` seconds is also sent to the
+    other tier and the first reply wins; 0 disables the fallback. The
+    budget counts from when the request is sent, not from when it was
+    queued or while it waits on its key's rate limit.
+    """
+    tier: str
+    budget: float = 0.0
+    small_max_tokens: int = 0
+
+
+# Link classification is trivial; summaries of long resumes and the final
+# messages are where the large model earns its latency.
+DEFAULT_POLICIES = {
+    "classify_links": RoutePolicy(SMALL, budget=10),
+    "summary": RoutePolicy(AUTO, budget=45),
+    "message": RoutePolicy(LARGE, budget=30),
+    "message_prefetch": RoutePolicy(LARGE),
+}
+
+
+@dataclass(frozen=True)
+class Route:
+    """A routing decision: the model to call and the one to fall back to."""
+    task: str
+    tier: str
+    model_name: str
+    fallback_model: str
+    budget: float
+    reason: str
+
+
+class ModelRouter:
+    """Picks a model per LLM call from the task and its input size.
+
+    Every decision is counted in `llm_route_total` and each routed call
+    leaves an `llm.route` span (tier, model, budget, fallback, latency), so
+    tiers and budgets can be tuned from the traces.
+    """
+
+    def __init__(self, models: Dict[str, str], policies: Dict[str, RoutePolicy]):
+        self.models = dict(models)
+        self.policies = dict(policies)
+
+    def policy(self, task: str) -> RoutePolicy:
+        return self.policies.get(task, RoutePolicy(LARGE))
+
+    def route(self, task: str, input_tokens: int = 0) -> Route:
+        """The decision for `task` at `input_tokens`, without recording it."""
+        policy = self.policy(task)
+        if policy.tier == AUTO:
+            small = input_tokens <= policy.small_max_tokens
+            tier = SMALL if small else LARGE
+            reason = f"{'short' if small else 'long'} input"
+        else:
+            tier = policy.tier if policy.tier in self.models else LARGE
+            reason = "policy"
+        other = LARGE if tier == SMALL else SMALL
+        return Route(task, tier, self.models[tier], self.models[other], policy.budget, reason)
+
+    def select(self, task: str, input_tokens: int = 0) -> Route:
+        """Like `route`, and counts the decision."""
+        route = self.route(task, input_tokens)
+        incr("llm_route_total", task=task, tier=route.tier)
+        return route
+
+    def candidates(self, task: str) -> Tuple[str, ...]:
+        """Every model that may answer `task`, for cache keys."""
+        if self.policy(task).budget or self.policy(task).tier == AUTO:
+            return tuple(self.models[tier] for tier in (SMALL, LARGE))
+        return (self.route(task).model_name,)
+
+    def invoke(self, task: str, prompt: str, temperature: float, api_key: str,
+               priority: int = PRIORITY_INTERACTIVE, input_tokens: Optional[int] = None):
+        """Scheduled `llm.invoke(prompt)` on the model routed for `task`.
+
+        If the reply takes longer than the task's budget, counted from when
+        the request is sent, the prompt is also sent to the other tier;
+        whichever answers first is returned and the other request is
+        dropped if it has not been sent yet. A call still queued or waiting
+        on its key's rate limit never falls back, since the fallback would
+        wait on the same key.
+
+        Args:
+            task (str): Routing policy and metrics label.
+            prompt (str): The formatted prompt.
+            temperature (float): Sampling temperature for either model.
+            api_key (str): Key the request is made with.
+            priority (int): Scheduler priority.
+            input_tokens (int, optional): Size used by "auto" policies;
+                estimated from the prompt if not given.
+        """
+        tokens = input_tokens if input_tokens is not None else len(prompt) // 4
+        route = self.select(task, tokens)
+        scheduler = get_scheduler()
+        with span("llm.route", task=task, tier=route.tier, model=route.model_name, reason=route.reason,
+                  input_tokens=tokens, budget=route.budget) as s:
+            started = time.perf_counter()
+            primary = scheduler.invoke_async(get_chat_model(route.model_name, temperature, api_key), prompt,
+                                             api_key=api_key, priority=priority, task=task)
+            futures = {primary: route.model_name}
+            if route.budget:
+                while not primary.running() and not primary.done():
+                    wait(futures, timeout=_START_POLL)
+            done, pending = wait(futures, timeout=route.budget or None)
+            if not done:
+                incr("llm_route_fallbacks_total", task=task, tier=route.tier)
+                fallback = scheduler.invoke_async(get_chat_model(route.fallback_model, temperature, api_key),
+                                                  prompt, api_key=api_key, priority=priority, task=task)
+                futures[fallback] = route.fallback_model
+                pending = set(futures)
+
+            # First successful reply wins; an error only counts once nothing else is left
+            winner = next((f for f in done if f.exception() is None), None)
+            while winner is None and pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                winner = next((f for f in done if f.exception() is None), None)
+            for future in pending:
+                future.cancel()
+            if winner is None:
+                winner = next(iter(futures))
+            s.set(fallback=len(futures) > 1, served_by=futures[winner],
+                  latency_ms=round((time.perf_counter() - started) * 1000, 1))
+            return winner.result()
+
+
+def default_policies() -> Dict[str, RoutePolicy]:
+    """DEFAULT_POLICIES with ROUTE_<TASK>_TIER / _BUDGET and ROUTE_SMALL_MAX_TOKENS applied."""
+    small_max_tokens = get_route_small_max_tokens()
+    return {
+        task: RoutePolicy(get_route_tier(task, policy.tier), get_route_budget(task, policy.budget), small_max_tokens)
+        for task, policy in DEFAULT_POLICIES.items()
+    }
+
+
+_default_router: Optional[ModelRouter] = None
+_default_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = ModelRouter({SMALL: get_small_model(), LARGE: get_large_model()}, default_policies())
+        return _default_router
@@ -0,0 +1,267 @@
+import io
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from utils.config import (
+    get_pdf_max_bytes,
+    get_pdf_max_pages,
+    get_pdf_timeout,
+    get_pdf_workers,
+)
+from utils.tracing import incr, span
+
+
+class PdfLimitError(ValueError):
+    """The PDF exceeds the configured page or byte limit."""
+
+
+class PdfTimeoutError(TimeoutError):
+    """PDF extraction did not finish within the configured time."""
+
+
+class PdfWorkerError(RuntimeError):
+    """The worker process parsing the PDF died, e.g. killed for using too much memory.
+
+    A server-side failure rather than a problem with the file, so it is not a
+    PdfLimitError; retrying later may succeed.
+    """
+
+
+def read_pdf_bytes(file) -> bytes:
+    """Contents of an uploaded file, file object or bytes."""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    file.seek(0)
+    return file.read()
+
+
+# Set in each worker process: tells the parent when a job starts, and where
+_started_queue = None
+
+
+def _init_worker(started_queue) -> None:
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _parse_in_worker(data: bytes, max_pages: int, timeout: float, job_id: Optional[str] = None):
+    # Imported here so the parent only pays for pdfminer when parsing inline
+    from utils.extract_text import parse_pdf
+
+    # Sent after the import so a cold worker's start-up is not billed to the job
+    if job_id is not None and _started_queue is not None:
+        _started_queue.put((job_id, os.getpid()))
+    cpu_start = time.process_time()
+    parsed = parse_pdf(io.BytesIO(data), maxpages=max_pages + 1 if max_pages else 0, timeout=timeout)
+    if max_pages and len(parsed.pages) > max_pages:
+        raise PdfLimitError(f"PDF has more than {max_pages} pages.")
+    # Measured here because the parent's span cannot see the worker's CPU time
+    parsed.cpu_ms = (time.process_time() - cpu_start) * 1000
+    return parsed
+
+
+class PdfJob:
+    """Handle for a submitted extraction; wraps the pool future."""
+
+    def __init__(self, future: Future, timeout: float, extractor: Optional["PdfExtractor"] = None,
+                 job_id: Optional[str] = None, executor: Optional[ProcessPoolExecutor] = None):
+        self.future = future
+        self.timeout = timeout
+        self.extractor = extractor
+        self.job_id = job_id
+        self.executor = executor
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self) -> bool:
+        """Drop the job if it has not started.
+
+        A running job is stopped by `result()`: once its time budget is spent
+        its worker process is killed and the pool replaced.
+        """
+        return self.future.cancel()
+
+    def result(self, timeout: Optional[float] = None):
+        """The ParsedPdf; the time limit counts from when a worker starts the job.
+
+        Raises:
+            PdfTimeoutError: If parsing exceeds the time limit.
+            PdfWorkerError: If the worker process died.
+        """
+        limit = timeout if timeout is not None else self.timeout
+        try:
+            started = self.extractor._wait_started(self.job_id, self.future) if self.extractor else None
+            remaining = limit - (time.monotonic() - started[0]) if started else limit
+            try:
+                return self.future.result(timeout=max(remaining, 0) if limit else None)
+            except FutureTimeoutError:
+                # A single slow page never reaches the worker's own deadline check
+                if started is None or not self.extractor._kill(started[1], self.executor):
+                    self.cancel()
+                raise PdfTimeoutError(f"PDF extraction took longer than {limit} seconds.")
+            except CancelledError:
+                raise PdfTimeoutError("PDF extraction was cancelled.")
+            except BrokenProcessPool:
+                self.extractor._replace_executor(self.executor)
+                raise PdfWorkerError("The PDF worker process died while parsing this file.")
+        finally:
+            if self.extractor is not None:
+                self.extractor._forget(self.job_id)
+
+
+class PdfExtractor:
+    """Runs CPU-heavy PDF parsing in a bounded pool of worker processes.
+
+    Keeping pdfminer out of the Streamlit script thread means a large or
+    pathological upload only occupies one worker, and other sessions keep
+    their GIL time.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 30, max_pages: int = 20, max_bytes: int = 10 * 1024 * 1024):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # job id -> (monotonic start, worker pid), filled from the workers' queue
+        self._started = {}
+        self._pending = set()
+        self._started_cond = threading.Condition()
+        self._started_queue = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded Streamlit server is not safe
+                context = multiprocessing.get_context("spawn")
+                if self._started_queue is None:
+                    self._started_queue = context.SimpleQueue()
+                    threading.Thread(target=self._listen_started, name="pdf-started", daemon=True).start()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self._started_queue,),
+                )
+            return self._executor
+
+    def _listen_started(self) -> None:
+        while True:
+            job_id, pid = self._started_queue.get()
+            with self._started_cond:
+                if job_id in self._pending:
+                    self._started[job_id] = (time.monotonic(), pid)
+                    self._started_cond.notify_all()
+
+    def _wait_started(self, job_id: Optional[str], future: Future):
+        """(start time, worker pid) once a worker picks the job up; None if it finished first."""
+        if job_id is None:
+            return None
+        with self._started_cond:
+            while job_id not in self._started and not future.done():
+                self._started_cond.wait(0.05)
+            return self._started.get(job_id)
+
+    def _forget(self, job_id: Optional[str]) -> None:
+        with self._started_cond:
+            self._pending.discard(job_id)
+            self._started.pop(job_id, None)
+
+    def _replace_executor(self, executor: Optional[ProcessPoolExecutor]) -> None:
+        """Drop `executor` so the next job gets a fresh pool; its other jobs fail with PdfWorkerError."""
+        with self._lock:
+            if executor is not None and self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _kill(self, pid: int, executor: Optional[ProcessPoolExecutor]) -> bool:
+        """Kill the worker stuck on a job and replace its pool."""
+        try:
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            return False
+        incr("pdf_worker_killed_total")
+        self._replace_executor(executor)
+        return True
+
+    def _check_size(self, data: bytes) -> None:
+        if self.max_bytes and len(data) > self.max_bytes:
+            raise PdfLimitError(f"PDF is larger than {self.max_bytes} bytes.")
+
+    def submit(self, file) -> PdfJob:
+        data = read_pdf_bytes(file)
+        self._check_size(data)
+        if self.max_workers <= 0:
+            future = Future()
+            try:
+                future.set_result(_parse_in_worker(data, self.max_pages, self.timeout))
+            except Exception as e:
+                future.set_exception(e)
+            return PdfJob(future, self.timeout)
+        job_id = uuid.uuid4().hex
+        with self._started_cond:
+            self._pending.add(job_id)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_parse_in_worker, data, self.max_pages, self.timeout, job_id)
+        except BrokenProcessPool:
+            # A worker died since the last job; start over on a fresh pool
+            self._replace_executor(executor)
+            executor = self._get_executor()
+            future = executor.submit(_parse_in_worker, data, self.max_pages, self.timeout, job_id)
+        return PdfJob(future, self.timeout, self, job_id, executor)
+
+    def extract(self, file):
+        """Parse `file` and block until its ParsedPdf is ready.
+
+        A job whose worker died because of another job sharing the pool is
+        retried once on a fresh pool.
+
+        Raises:
+            PdfLimitError: If the PDF is over the page or byte limit.
+            PdfTimeoutError: If parsing exceeds the time limit.
+            PdfWorkerError: If the worker process died twice on this PDF.
+        """
+        with span("pdf.extract", workers=self.max_workers) as s:
+            data = read_pdf_bytes(file)
+            s.set(bytes=len(data))
+            try:
+                parsed = self.submit(data).result()
+            except PdfWorkerError:
+                s.set(retried=True)
+                parsed = self.submit(data).result()
+            s.set(pages=len(parsed.pages), links=len(parsed.links), worker_cpu_ms=round(parsed.cpu_ms, 1))
+            return parsed
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_default_extractor: Optional[PdfExtractor] = None
+_default_extractor_lock = threading.Lock()
+
+
+def get_pdf_extractor() -> PdfExtractor:
+    global _default_extractor
+    with _default_extractor_lock:
+        if _default_extractor is None:
+            _default_extractor = PdfExtractor(
+                max_workers=get_pdf_workers(),
+                timeout=get_pdf_timeout(),
+                max_pages=get_pdf_max_pages(),
+                max_bytes=get_pdf_max_bytes(),
+            )
+        return _default_extractor
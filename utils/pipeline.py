@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from utils.classify_links import classify_links
+from utils.config import LLMContext
+from utils.pdf_worker import get_pdf_extractor, read_pdf_bytes
+from utils.profile_store import Profile, get_profile_store, resume_hash, resume_identity
+from utils.summarize_resume import extract_resume_summary, update_resume_summary
+from utils.tracing import span
+
+
+# Stage names reported to `on_progress`, in the order they can complete
+UPLOAD_STAGES = ("extract", "links", "summary")
+
+
+def process_resume(file, on_progress: Optional[Callable[[str, int, int], None]] = None,
+                   context: Optional[LLMContext] = None, use_store: bool = True):
+    """Extract, classify links and summarize an uploaded resume.
+
+    The PDF is parsed first; link classification and summarization are
+    independent LLM calls, so they then run side by side and the upload
+    takes about as long as the slower of the two. A file seen before is
+    answered from the profile store without any of that, and a revision
+    of a stored resume (same email address) only has its changed sections
+    re-summarized.
+
+    Args:
+        file: The uploaded PDF.
+        on_progress (callable, optional): Called as
+            `on_progress(stage, completed, total)` from the calling thread
+            each time a stage finishes, so it may safely touch Streamlit.
+        context (LLMContext, optional): The session's LLM credentials.
+        use_store (bool): Read from and write to the profile store.
+
+    Returns:
+        tuple: (resume_text, links, summary)
+    """
+    with span("upload") as s:
+        return _process_resume(file, on_progress, context, use_store, s)
+
+
+def _process_resume(file, on_progress, context, use_store, s):
+    total = len(UPLOAD_STAGES)
+
+    def report(stage: str, completed: int) -> None:
+        if on_progress is not None:
+            on_progress(stage, completed, total)
+
+    data = read_pdf_bytes(file)
+    store = get_profile_store() if use_store else None
+    key = resume_hash(data)
+    profile = store.get_profile(key) if store is not None else None
+    s.set(profile_hit=profile is not None)
+    if profile is not None:
+        for completed, stage in enumerate(UPLOAD_STAGES, start=1):
+            report(stage, completed)
+        return profile.resume_text, profile.links, profile.summary
+
+    parsed = get_pdf_extractor().extract(data)
+    resume_text = parsed.text
+    report("extract", 1)
+
+    identity = resume_identity(resume_text)
+    previous = store.latest_profile(identity) if store is not None and identity else None
+    s.set(revision=previous is not None)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        if previous is not None:
+            summarize = pool.submit(update_resume_summary, resume_text, previous.resume_text, previous.summary,
+                                    context=context)
+        else:
+            summarize = pool.submit(extract_resume_summary, resume_text, context=context)
+        futures = {
+            pool.submit(classify_links, parsed.links, context=context): "links",
+            summarize: "summary",
+        }
+        for completed, future in enumerate(as_completed(futures), start=2):
+            stage = futures[future]
+            results[stage] = future.result()
+            report(stage, completed)
+
+    if store is not None and results["summary"] is not None:
+        store.save_profile(Profile(key, resume_text, results["summary"], results["links"], identity))
+    return resume_text, results["links"], results["summary"]
@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from utils.config import (
+    get_profile_store_max_profiles,
+    get_profile_store_max_templates,
+    get_profile_store_path,
+)
+from utils.tracing import incr
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    resume_hash TEXT PRIMARY KEY,
+    resume_text TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    links TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_accessed ON profiles (accessed);
+
+CREATE TABLE IF NOT EXISTS templates (
+    key TEXT PRIMARY KEY,
+    summary_hash TEXT NOT NULL,
+    job_type TEXT NOT NULL,
+    message_type TEXT NOT NULL,
+    variant INTEGER NOT NULL,
+    template TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS templates_lookup ON templates (summary_hash, job_type, message_type);
+CREATE INDEX IF NOT EXISTS templates_accessed ON templates (accessed);
+"""
+
+# Applied in order to databases whose PRAGMA user_version is below their index + 1
+_MIGRATIONS = (
+    """
+    ALTER TABLE profiles ADD COLUMN identity TEXT;
+    CREATE INDEX IF NOT EXISTS profiles_identity ON profiles (identity, accessed);
+    """,
+)
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+
+def resume_hash(data: bytes) -> str:
+    """Identity of an uploaded resume file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def resume_identity(resume_text: str) -> Optional[str]:
+    """Who a resume belongs to, for finding earlier revisions of it.
+
+    A hash of the first email address together with the first line (normally
+    the candidate's name), so a resume that merely mentions someone else's
+    address is not taken for theirs. None if either is missing.
+    """
+    text = resume_text or ""
+    match = _EMAIL.search(text)
+    first_line = next((line for line in text.splitlines() if line.strip()), "")
+    if match is None or not first_line:
+        return None
+    name = " ".join(first_line.lower().split())
+    return hashlib.sha256(f"{match.group(0).lower()}\x00{name}".encode("utf-8")).hexdigest()
+
+
+def summary_hash(summary: str) -> str:
+    return hashlib.sha256(summary.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Profile:
+    """A parsed resume: its text, classified links and summary."""
+    resume_hash: str
+    resume_text: str
+    summary: dict
+    links: dict
+    identity: Optional[str] = None
+
+
+@dataclass
+class TemplateRecord:
+    """A generated template with the inputs it is indexed by."""
+    key: str
+    summary_hash: str
+    job_type: str
+    message_type: str
+    variant: int
+    template: str
+
+
+_PROFILE_COLUMNS = "resume_hash, resume_text, summary, links, identity"
+
+
+def _profile(row) -> Profile:
+    return Profile(row[0], row[1], json.loads(row[2]), json.loads(row[3]), row[4])
+
+
+class ProfileStore:
+    """SQLite store of parsed resumes and generated templates.
+
+    Lets a returning user skip extraction, summarization and template
+    generation across browser refreshes and server restarts. Both tables
+    are size-bounded; the least recently used rows are deleted first.
+    """
+
+    def __init__(self, path: str, max_profiles: int = 1000, max_templates: int = 10000):
+        self.path = path
+        self.max_profiles = max_profiles
+        self.max_templates = max_templates
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection shared by every session's thread, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(_MIGRATIONS[version:], start=version + 1):
+                self._conn.executescript(migration)
+                self._conn.execute(f"PRAGMA user_version = {number}")
+
+    def get_profile(self, resume_hash: str) -> Optional[Profile]:
+        profiles = self.get_profiles([resume_hash])
+        return profiles.get(resume_hash)
+
+    def get_profiles(self, resume_hashes: Iterable[str]) -> Dict[str, Profile]:
+        resume_hashes = list(resume_hashes)
+        if not resume_hashes:
+            return {}
+        marks = ",".join("?" * len(resume_hashes))
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT {_PROFILE_COLUMNS} FROM profiles WHERE resume_hash IN ({marks})",
+                resume_hashes,
+            ).fetchall()
+            if rows:
+                self._conn.execute(f"UPDATE profiles SET accessed = ? WHERE resume_hash IN ({marks})",
+                                   [time.time(), *resume_hashes])
+        incr("profile_store_hits_total", len(rows), table="profiles")
+        incr("profile_store_misses_total", len(resume_hashes) - len(rows), table="profiles")
+        return {row[0]: _profile(row) for row in rows}
+
+    def latest_profile(self, identity: str) -> Optional[Profile]:
+        """The most recently used profile with this identity (an earlier revision of a resume)."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_PROFILE_COLUMNS} FROM profiles WHERE identity = ? ORDER BY accessed DESC LIMIT 1",
+                (identity,),
+            ).fetchone()
+        return _profile(row) if row is not None else None
+
+    def save_profile(self, profile: Profile) -> None:
+        self.save_profiles([profile])
+
+    def save_profiles(self, profiles: Iterable[Profile]) -> None:
+        now = time.time()
+        rows = [(p.resume_hash, p.resume_text, json.dumps(p.summary), json.dumps(p.links), p.identity, now, now)
+                for p in profiles]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO profiles (resume_hash, resume_text, summary, links, identity, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict("profiles", "resume_hash", self.max_profiles)
+
+    def delete_profile(self, resume_hash: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM profiles WHERE resume_hash = ?", (resume_hash,)).rowcount > 0
+
+    def get_template(self, key: str) -> Optional[str]:
+        return self.get_templates([key]).get(key)
+
+    def get_templates(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Templates for the given cache keys, in one query."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        marks = ",".join("?" * len(keys))
+        with self._lock, self._conn:
+            rows = self._conn.execute(f"SELECT key, template FROM templates WHERE key IN ({marks})", keys).fetchall()
+            if rows:
+                self._conn.execute(f"UPDATE templates SET accessed = ? WHERE key IN ({marks})", [time.time(), *keys])
+        incr("profile_store_hits_total", len(rows), table="templates")
+        incr("profile_store_misses_total", len(keys) - len(rows), table="templates")
+        return dict(rows)
+
+    def templates_for(self, summary: str, job_type: Optional[str] = None,
+                      message_type: Optional[str] = None) -> List[TemplateRecord]:
+        """Every stored template for a summary, optionally narrowed by job and message type."""
+        query = ("SELECT key, summary_hash, job_type, message_type, variant, template FROM templates "
+                 "WHERE summary_hash = ?")
+        params = [summary_hash(summary)]
+        if job_type is not None:
+            query += " AND job_type = ?"
+            params.append(job_type)
+        if message_type is not None:
+            query += " AND message_type = ?"
+            params.append(message_type)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY message_type, variant", params).fetchall()
+        return [TemplateRecord(*row) for row in rows]
+
+    def save_templates(self, records: Iterable[TemplateRecord]) -> None:
+        now = time.time()
+        rows = [(r.key, r.summary_hash, r.job_type, r.message_type, r.variant, r.template, now, now)
+                for r in records]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO templates "
+                "(key, summary_hash, job_type, message_type, variant, template, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict("templates", "key", self.max_templates)
+
+    def _evict(self, table: str, key_column: str, max_rows: int) -> None:
+        # Caller holds the lock and the transaction
+        if max_rows <= 0:
+            return
+        deleted = self._conn.execute(
+            f"DELETE FROM {table} WHERE {key_column} IN "
+            f"(SELECT {key_column} FROM {table} ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (max_rows,),
+        ).rowcount
+        if deleted > 0:
+            incr("profile_store_evictions_total", deleted, table=table)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM profiles")
+            self._conn.execute("DELETE FROM templates")
+
+    def stats(self) -> dict:
+        with self._lock:
+            profiles = self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+            templates = self._conn.execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+        return {"profiles": profiles, "templates": templates}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_store: Optional[ProfileStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_profile_store() -> Optional[ProfileStore]:
+    """Process-wide store, or None when PROFILE_STORE_PATH is empty."""
+    global _default_store
+    path = get_profile_store_path()
+    if not path:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ProfileStore(
+                path,
+                max_profiles=get_profile_store_max_profiles(),
+                max_templates=get_profile_store_max_templates(),
+            )
+        return _default_store
@@ -0,0 +1,105 @@
+import json
+import re
+from typing import List
+
+import numpy as np
+
+
+def _tokenize(text: str) -> List[str]:
+    return [t.strip(".") for t in re.findall(r"[a-z0-9][a-z0-9+#.]*", (text or "").lower()) if t.strip(".")]
+
+
+def relevance_scores(items: List[str], query: str) -> np.ndarray:
+    """TF-IDF cosine similarity of each item to `query`.
+
+    The vocabulary and IDF come from the items themselves, so this needs no
+    model or network and is cheap for the few dozen entries in a resume.
+    """
+    docs = [_tokenize(item) for item in items] + [_tokenize(query)]
+    vocab = {tok: i for i, tok in enumerate(sorted({t for doc in docs for t in doc}))}
+    if not items or not vocab:
+        return np.zeros(len(items))
+
+    counts = np.zeros((len(docs), len(vocab)))
+    for row, doc in enumerate(docs):
+        for tok in doc:
+            counts[row, vocab[tok]] += 1
+
+    tf = np.where(counts > 0, 1 + np.log(np.maximum(counts, 1)), 0.0)
+    df = (counts[:-1] > 0).sum(axis=0)
+    idf = np.log((1 + len(items)) / (1 + df)) + 1
+    weights = tf * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    weights = weights / np.where(norms == 0, 1, norms)
+    return weights[:-1] @ weights[-1]
+
+
+def top_k(items: list, texts: List[str], query: str, k: int) -> list:
+    """The `k` items most relevant to `query`, ties kept in original order."""
+    if k <= 0 or not items:
+        return []
+    order = np.argsort(-relevance_scores(texts, query), kind="stable")
+    return [items[i] for i in order[:k]]
+
+
+def project_summary(summary: dict, job_type: str, skills: int = 10, projects: int = 2,
+                    experiences: int = 3, bullets: int = 2, education: int = 1, certifications: int = 3) -> dict:
+    """Reduce a Summary dict to the parts most relevant to `job_type`.
+
+    Keeps the headline fields, target roles, the first education entries
+    and the top skills, projects, experience bullets and certifications,
+    so message prompts stay small and on topic. Education is kept even when
+    nothing else ranks: for entry-level candidates it is often the main
+    qualification.
+    """
+    query = job_type or " ".join(summary.get("target_roles") or [])
+
+    skill_list = (summary.get("technical_skills") or []) + (summary.get("soft_skills") or [])
+    project_list = summary.get("notable_projects") or []
+    experience_list = summary.get("work_experience") or []
+    certification_list = summary.get("certifications") or []
+
+    top_projects = top_k(
+        project_list,
+        [f"{p.get('name', '')} {p.get('description', '')} {' '.join(p.get('technologies') or [])}" for p in project_list],
+        query, projects,
+    )
+    top_experience = top_k(
+        experience_list,
+        [f"{e.get('job_title', '')} {' '.join(e.get('key_responsibilities') or [])}" for e in experience_list],
+        query, experiences,
+    )
+
+    payload = {
+        "full_name": summary.get("full_name"),
+        "professional_summary": summary.get("professional_summary"),
+        "total_experience": summary.get("total_experience"),
+        "career_level": summary.get("career_level"),
+        "skills": top_k(skill_list, skill_list, query, skills),
+        "experience": [
+            {
+                "job_title": e.get("job_title"),
+                "company": e.get("company"),
+                "duration": e.get("duration"),
+                "highlights": top_k(e.get("key_responsibilities") or [], e.get("key_responsibilities") or [], query, bullets),
+            }
+            for e in top_experience
+        ],
+        "projects": [
+            {"name": p.get("name"), "description": p.get("description"), "technologies": (p.get("technologies") or [])[:5]}
+            for p in top_projects
+        ],
+        "education": [
+            {"degree": e.get("degree"), "institution": e.get("institution"), "year": e.get("year")}
+            for e in (summary.get("education") or [])[:education]
+        ],
+        "certifications": top_k(certification_list, certification_list, query, certifications),
+        "target_roles": (summary.get("target_roles") or [])[:3],
+        "achievements": (summary.get("achievements") or [])[:2],
+    }
+    return {key: value for key, value in payload.items() if value}
+
+
+def summary_prompt_payload(summary: dict, job_type: str) -> str:
+    """Compact JSON of `project_summary`, ready to use as UserInput.summary."""
+    return json.dumps(project_summary(summary, job_type), separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,179 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class ResumeSection:
+    name: str
+    heading: str
+    text: str
+
+    def render(self) -> str:
+        return f"{self.heading}\n{self.text}".strip() if self.heading else self.text
+
+
+# Canonical section name -> headings that introduce it (lower case, no colon)
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "objective", "career objective", "about me", "about"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "internships", "internship", "experience & internships"),
+    "education": ("education", "academic background", "academics", "education & qualifications"),
+    "projects": ("projects", "personal projects", "academic projects", "notable projects", "key projects"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "technologies", "tech stack", "skills & tools"),
+    "certifications": ("certifications", "certificates", "licenses & certifications", "courses"),
+    "achievements": ("achievements", "awards", "honors", "honors & awards", "accomplishments"),
+    "other": ("publications", "volunteering", "volunteer experience", "interests", "hobbies", "languages",
+              "extracurricular activities", "positions of responsibility", "leadership"),
+}
+
+_HEADING_LOOKUP = {h: name for name, headings in SECTION_HEADINGS.items() for h in headings}
+
+# When the budget is tight, sections are kept in this order of importance
+SECTION_PRIORITY = ("header", "summary", "experience", "skills", "projects", "education",
+                    "certifications", "achievements", "other")
+
+# "Page 3", "Page 3 of 5", "3 of 5": page labels wherever they appear
+_PAGE_LABEL = re.compile(r"^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s+of\s+\d+)$", re.IGNORECASE)
+# "3" or "3/5" is only a page number on a page's first or last line; elsewhere
+# it is as likely a graduation year or a job date such as "06/2021"
+_EDGE_PAGE_NUMBER = re.compile(r"^\d{1,3}(\s*/\s*\d{1,3})?$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)."""
+    return (len(text) + 3) // 4
+
+
+def clean_resume_text(text: str) -> str:
+    """Normalize raw PDF text and drop repeated boilerplate.
+
+    Lines repeated at the top or bottom of most pages, page labels, bare
+    page numbers on a page's first or last line and duplicated long lines
+    are removed; whitespace is collapsed.
+    """
+    pages = [p for p in (text or "").split("\f") if p.strip()]
+    page_lines = [[re.sub(r"[ \t ]+", " ", line).strip() for line in page.splitlines()] for page in pages]
+
+    # Headers/footers: the same line at the top or bottom of most pages
+    boilerplate = set()
+    if len(page_lines) > 1:
+        edges = [[line for line in lines if line] for lines in page_lines]
+        counts = Counter(line for lines in edges for line in set(lines[:3] + lines[-3:]))
+        boilerplate = {line for line, n in counts.items() if n >= max(2, (len(page_lines) + 1) // 2)}
+
+    seen_long = set()
+    kept = []
+    for lines in page_lines:
+        content = [i for i, line in enumerate(lines) if line]
+        edges = {content[0], content[-1]} if content else set()
+        for i, line in enumerate(lines):
+            if not line:
+                if kept and kept[-1]:
+                    kept.append("")
+                continue
+            if line in boilerplate or _PAGE_LABEL.match(line):
+                continue
+            if i in edges and _EDGE_PAGE_NUMBER.match(line):
+                continue
+            if kept and line == kept[-1]:
+                continue
+            if len(line) >= 40:
+                if line in seen_long:
+                    continue
+                seen_long.add(line)
+            kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def _heading_name(line: str):
+    if len(line) > 40:
+        return None
+    key = re.sub(r"[^a-z& ]", "", line.lower()).strip()
+    return _HEADING_LOOKUP.get(re.sub(r"\s+", " ", key))
+
+
+def split_sections(text: str) -> List[ResumeSection]:
+    """Split cleaned resume text into sections by their headings.
+
+    Text before the first recognised heading (name, contact details) becomes
+    the "header" section.
+    """
+    sections = [ResumeSection("header", "", "")]
+    body = []
+    for line in text.splitlines():
+        name = _heading_name(line.strip())
+        if name:
+            sections[-1].text = "\n".join(body).strip()
+            sections.append(ResumeSection(name, line.strip(), ""))
+            body = []
+        else:
+            body.append(line)
+    sections[-1].text = "\n".join(body).strip()
+    return [s for s in sections if s.text or s.heading]
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    kept, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def apply_token_budget(sections: List[ResumeSection], budget: int) -> List[ResumeSection]:
+    """Keep the most important sections that fit in `budget` tokens.
+
+    Sections are admitted by SECTION_PRIORITY; the first one that does not
+    fit is cut at a line boundary. Document order is preserved.
+    """
+    if budget <= 0 or estimate_tokens("\n\n".join(s.render() for s in sections)) <= budget:
+        return sections
+
+    order = sorted(range(len(sections)),
+                   key=lambda i: (SECTION_PRIORITY.index(sections[i].name), i))
+    remaining = budget
+    allowed = {}
+    for i in order:
+        section = sections[i]
+        cost = estimate_tokens(section.render() + "\n\n")
+        if cost <= remaining:
+            allowed[i] = section
+            remaining -= cost
+        elif remaining > estimate_tokens(section.heading) + 16:
+            text = _truncate(section.text, remaining - estimate_tokens(section.heading + "\n\n"))
+            allowed[i] = ResumeSection(section.name, section.heading, text)
+            remaining = 0
+    return [allowed[i] for i in sorted(allowed)]
+
+
+def chunk_sections(sections: List[ResumeSection], budget: int) -> List[List[ResumeSection]]:
+    """Group sections into chunks of at most `budget` tokens each.
+
+    A section larger than the budget is cut down to fit its own chunk.
+    """
+    chunks, current, used = [], [], 0
+    for section in sections:
+        cost = estimate_tokens(section.render() + "\n\n")
+        if cost > budget:
+            fitted = apply_token_budget([section], budget)
+            if not fitted:
+                continue
+            section = fitted[0]
+            cost = estimate_tokens(section.render() + "\n\n")
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(section)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def join_sections(sections: List[ResumeSection]) -> str:
+    return "\n\n".join(s.render() for s in sections)
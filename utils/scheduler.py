@@ -0,0 +1,319 @@
+import hashlib
+import heapq
+import itertools
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Iterator, Optional
+
+from utils.config import (
+    get_groq_api_key,
+    get_llm_max_retries,
+    get_llm_requests_per_minute,
+    get_llm_scheduler_workers,
+    get_llm_tokens_per_minute,
+)
+from utils.tracing import incr
+
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_UPLOAD = 1
+PRIORITY_BACKGROUND = 5
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError"}
+
+# Assumed completion size when reserving tokens-per-minute for a request
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429s, 5xx, timeouts and connection errors are worth retrying."""
+    if _status_code(exc) in RETRYABLE_STATUS:
+        return True
+    return type(exc).__name__ in RETRYABLE_ERRORS or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 20.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to `per_minute` capacity.
+
+    `reserve` takes units immediately (going into debt if needed) and returns
+    how long the caller must wait before using them, so concurrent callers
+    are spaced out instead of all waking at once.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.level -= amount
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one API key."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def reserve(self, tokens: int) -> float:
+        """Book a request of `tokens`; returns how long to wait before sending it."""
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens: int) -> float:
+        """Block until a request of `tokens` may be sent; returns the time waited."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class _Job:
+    def __init__(self, fn: Callable[[], object], api_key: str, tokens: int, task: str, key: Optional[str]):
+        self.fn = fn
+        self.api_key = api_key
+        self.tokens = tokens
+        self.task = task
+        self.key = key
+        self.future = Future()
+        self.attempt = 0
+        # Rate limit already booked for the next attempt
+        self.reserved = False
+
+
+class LLMScheduler:
+    """Shared front door for LLM calls.
+
+    Calls are queued by priority and served by a fixed pool of worker
+    threads. Each call first waits on its API key's rate limits, is retried
+    with jittered exponential backoff on 429s and transient errors, and
+    identical calls already in flight share a single request.
+
+    Waits never occupy a worker: a call that must wait for its key's rate
+    limit or a retry is set aside until it is due and then queued again,
+    so one busy key cannot stall the calls of every other key. A call's
+    Future only turns "running" when its request is sent; until then it
+    can be cancelled.
+    """
+
+    def __init__(self, workers: int = 8, requests_per_minute: int = 30, tokens_per_minute: int = 30000,
+                 max_retries: int = 4):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._limiters = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        # (due time, sequence, priority, job) for calls waiting on a limit or a retry
+        self._delayed = []
+        self._delayed_cond = threading.Condition()
+        self._workers = [threading.Thread(target=self._work, name=f"llm-scheduler-{i}", daemon=True)
+                         for i in range(workers)]
+        self._workers.append(threading.Thread(target=self._release_delayed, name="llm-scheduler-timer", daemon=True))
+        for worker in self._workers:
+            worker.start()
+
+    def limiter(self, api_key: str) -> RateLimiter:
+        with self._lock:
+            if api_key not in self._limiters:
+                self._limiters[api_key] = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+            return self._limiters[api_key]
+
+    def submit(self, fn: Callable[[], object], api_key: str, tokens: int = 0, priority: int = PRIORITY_INTERACTIVE,
+               task: str = "llm", key: Optional[str] = None) -> Future:
+        """Queue `fn` and return a Future for its result.
+
+        Args:
+            fn (callable): Makes the LLM call; may be run several times on retry.
+            api_key (str): Key whose rate limits apply.
+            tokens (int): Estimated prompt plus completion tokens.
+            priority (int): Lower values are served first.
+            task (str): Label for metrics.
+            key (str, optional): Calls with the same key in flight at the
+                same time share one request and result.
+        """
+        with self._lock:
+            inflight = self._inflight.get(key) if key is not None else None
+            if inflight is not None and not inflight.future.cancelled():
+                incr("llm_coalesced_total", task=task)
+                return inflight.future
+            job = _Job(fn, api_key, tokens, task, key)
+            if key is not None:
+                self._inflight[key] = job
+        self._queue.put((priority, next(self._sequence), job))
+        return job.future
+
+    def _work(self) -> None:
+        while True:
+            priority, sequence, job = self._queue.get()
+            try:
+                delay = self._step(job)
+                if delay is not None:
+                    with self._delayed_cond:
+                        heapq.heappush(self._delayed, (time.monotonic() + delay, sequence, priority, job))
+                        self._delayed_cond.notify()
+            finally:
+                self._queue.task_done()
+
+    def _step(self, job: _Job) -> Optional[float]:
+        """Make one attempt at `job`; returns how long to set it aside, or None once it is settled."""
+        if job.future.cancelled():
+            self._finish(job)
+            return None
+        if not job.reserved:
+            job.reserved = True
+            wait = self.limiter(job.api_key).reserve(job.tokens)
+            if wait > 0:
+                return wait
+        job.reserved = False
+        if not job.future.running() and not job.future.set_running_or_notify_cancel():
+            self._finish(job)
+            return None
+        try:
+            result = job.fn()
+        except BaseException as e:
+            if job.attempt < self.max_retries and is_retryable(e):
+                job.attempt += 1
+                incr("llm_retries_total", task=job.task)
+                return retry_after(e) or backoff_delay(job.attempt - 1)
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        self._finish(job)
+        return None
+
+    def _finish(self, job: _Job) -> None:
+        if job.key is not None:
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+
+    def _release_delayed(self) -> None:
+        """Queue set-aside calls again once they are due."""
+        while True:
+            with self._delayed_cond:
+                while not self._delayed:
+                    self._delayed_cond.wait()
+                due, sequence, priority, job = self._delayed[0]
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._delayed_cond.wait(remaining)
+                    continue
+                heapq.heappop(self._delayed)
+            self._queue.put((priority, sequence, job))
+
+    def run_with_retries(self, fn: Callable[[], object], api_key: str, tokens: int, task: str):
+        """Run `fn` in the calling thread under rate limits and retries."""
+        limiter = self.limiter(api_key)
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                incr("llm_retries_total", task=task)
+                time.sleep(retry_after(e) or backoff_delay(attempt))
+
+    def invoke(self, llm, prompt: str, api_key: Optional[str] = None, priority: int = PRIORITY_INTERACTIVE,
+               task: str = "llm", dedupe: bool = True, timeout: Optional[float] = None):
+        """Scheduled `llm.invoke(prompt)`; blocks until the reply arrives."""
+        return self.invoke_async(llm, prompt, api_key, priority, task, dedupe).result(timeout=timeout)
+
+    def invoke_async(self, llm, prompt: str, api_key: Optional[str] = None, priority: int = PRIORITY_INTERACTIVE,
+                     task: str = "llm", dedupe: bool = True) -> Future:
+        """Scheduled `llm.invoke(prompt)`; returns a Future for the reply.
+
+        Cancelling the Future drops the call if its request has not been sent yet,
+        including while it waits on the rate limit.
+        """
+        api_key = api_key if api_key is not None else get_groq_api_key()
+        key = request_key(llm, prompt, api_key) if dedupe else None
+        tokens = len(prompt) // 4 + DEFAULT_COMPLETION_TOKENS
+        return self.submit(lambda: llm.invoke(prompt), api_key, tokens, priority, task, key)
+
+    def stream(self, llm, prompt: str, api_key: Optional[str] = None, task: str = "llm") -> Iterator:
+        """Rate-limited `llm.stream(prompt)`, retried until the first chunk arrives.
+
+        Streams run in the caller's thread so chunks reach the UI directly;
+        they are not queued or coalesced.
+        """
+        api_key = api_key if api_key is not None else get_groq_api_key()
+        tokens = len(prompt) // 4 + DEFAULT_COMPLETION_TOKENS
+        chunks = iter(())
+        first = None
+
+        def start():
+            nonlocal chunks, first
+            chunks = iter(llm.stream(prompt))
+            first = next(chunks, None)
+
+        self.run_with_retries(start, api_key, tokens, task)
+        if first is not None:
+            yield first
+            yield from chunks
+
+
+def request_key(llm, prompt: str, api_key: str) -> str:
+    """Identity of a request for in-flight deduplication."""
+    model = getattr(llm, "model_name", None) or type(llm).__name__
+    temperature = getattr(llm, "temperature", None)
+    h = hashlib.sha256()
+    for part in (api_key, str(model), str(temperature), prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                workers=get_llm_scheduler_workers(),
+                requests_per_minute=get_llm_requests_per_minute(),
+                tokens_per_minute=get_llm_tokens_per_minute(),
+                max_retries=get_llm_max_retries(),
+            )
+        return _scheduler
@@ -1,37 +1,57 @@
-from typing import Optional
-from langchain_groq import ChatGroq
-from langchain.output_parsers import PydanticOutputParser
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
 from pydantic import ValidationError
-from models.summary import Summary 
-from langchain.prompts import PromptTemplate
-from utils.config import get_groq_api_key
+from models.summary import ContactInfo, Summary
+from utils.config import (
+    LLMContext,
+    get_resume_incremental_max_change,
+    get_resume_parallel_sections,
+    get_resume_token_budget,
+    resolve_context,
+)
+from utils.json_repair import compact_schema, parse_json_model
+from utils.model_router import get_router
+from utils.scheduler import PRIORITY_UPLOAD
+from utils.resume_sections import (
+    ResumeSection,
+    apply_token_budget,
+    chunk_sections,
+    clean_resume_text,
+    estimate_tokens,
+    join_sections,
+    split_sections,
+)
+from utils.tracing import incr, record_llm_usage, span
+from utils.summary_cache import get_summary_cache, make_cache_key, schema_fingerprint
 
 
 
 
-parser = PydanticOutputParser(pydantic_object=Summary)
+SUMMARY_TEMPERATURE = 0.1
 
-def extract_resume_summary(resume_text: str) -> str: # <--- Returns Summary object
-    """
-    Extract structured resume information using LLM with forced JSON output.
-
-    Args:
-        resume_text (str): The raw text content of the resume
+# Summary fields extracted from each resume section, for incremental updates.
+# Sections not listed here ("summary", "other") feed no field of their own.
+SECTION_FIELDS = {
+    "header": ("full_name", "contact_info"),
+    "experience": ("work_experience",),
+    "education": ("education",),
+    "projects": ("notable_projects",),
+    "skills": ("technical_skills", "soft_skills"),
+    "certifications": ("certifications",),
+    "achievements": ("achievements",),
+}
 
-    Returns:
-        Summary: Structured resume data as a Pydantic model
+# Fields drawn from the resume as a whole (skills are also inferred from
+# experience and projects); re-derived whenever any section changes
+WHOLE_RESUME_FIELDS = ("professional_summary", "target_roles", "total_experience", "career_level",
+                       "technical_skills", "soft_skills")
 
-    Raises:
-        ValueError: If API key is not provided or found
-        Exception: For API or parsing errors
-    """
-    GROQ_API_KEY = get_groq_api_key()
-    if not GROQ_API_KEY:
-        raise ValueError("GROQ_API_KEY is not set.")
+INCREMENTAL_CONTEXT = "\n\nALREADY EXTRACTED FROM THE UNCHANGED SECTIONS (JSON):\n{fields}"
 
-    # Create system prompt with schema enforcement
-    system_prompt_template = PromptTemplate(
-        template="""You are an expert resume parser. Extract information from the resume text and return ONLY a valid JSON object matching this schema:
+# Kept at module level so the summary cache key changes whenever the prompt does
+SUMMARY_PROMPT = """You are an expert resume parser. Extract information from the resume text and return ONLY a valid JSON object matching this schema:
 
     {format_instructions}
 
@@ -51,35 +71,245 @@ def extract_resume_summary(resume_text: str) -> str: # <--- Returns Summary obje
     {resume_text}
 
     Respond with the JSON immediately.
-    """, # <--- Added emphasis on work_experience rules
+    """ # <--- Added emphasis on work_experience rules
+
+# Compact shape of the Summary model; the full JSON schema from
+# PydanticOutputParser costs several times the tokens
+SUMMARY_FORMAT = compact_schema(Summary)
+
+# Create system prompt with schema enforcement on the first summary
+@lru_cache(maxsize=None)
+def get_summary_prompt():
+    from langchain_core.prompts import PromptTemplate
+
+    return PromptTemplate(
+        template=SUMMARY_PROMPT,
         input_variables=["resume_text"],
-        partial_variables={"format_instructions": parser.get_format_instructions()}
+        partial_variables={"format_instructions": SUMMARY_FORMAT}
     )
 
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama3-70b-8192",
-        temperature=0.1,
-    )
+def summary_model() -> str:
+    """The models a summary may come from, as recorded with cached summaries."""
+    return "+".join(get_router().candidates("summary"))
 
-    try:
-        # Format the full prompt with resume text
-        formatted_prompt = system_prompt_template.format(resume_text=resume_text)
+def summary_cache_key(resume_text: str) -> str:
+    # The budget and chunking decide which sections the LLM sees
+    settings = f"budget={get_resume_token_budget()};parallel={get_resume_parallel_sections()}"
+    return make_cache_key(resume_text, SUMMARY_PROMPT + SUMMARY_FORMAT, schema_fingerprint(Summary), summary_model(),
+                          settings)
 
-        response_message = llm.invoke(formatted_prompt)
+def _summarize_text(resume_text: str, api_key: str) -> Summary:
+    # Format the full prompt with resume text
+    formatted_prompt = get_summary_prompt().format(resume_text=resume_text)
+    resume_tokens = estimate_tokens(resume_text)
 
-        # Parse the content of the AIMessage into the Pydantic object
-        # This will return a Summary object
-        parsed_summary = parser.parse(response_message.content)
-        return parsed_summary.model_dump() # <--- Return the Pydantic object directly
+    # Short resumes (or chunks of long ones) go to the small model
+    with span("llm.summary", resume_tokens=resume_tokens) as s:
+        response_message = get_router().invoke(
+            "summary", formatted_prompt, temperature=SUMMARY_TEMPERATURE, api_key=api_key,
+            priority=PRIORITY_UPLOAD, input_tokens=resume_tokens
+        )
+        record_llm_usage(s, response_message, "summary")
 
-    except ValidationError as ve:
-        print(f"Pydantic Validation Error: {ve}")
-        # Optionally re-raise or return a default/empty Summary object
-        raise # Re-raise if you want the error to propagate
-    except Exception as e:
-        print(f"API or general error during summary extraction: {e}")
-        raise # Re-raise for clarity
+    # Parse the content of the AIMessage into the Pydantic object, repairing
+    # fences, comments or stray prose locally rather than re-asking the LLM
+    return parse_json_model(response_message.content, Summary, task="summary")
+
+def _merge_list(values: list) -> list:
+    merged, seen = [], set()
+    for value in values:
+        key = value.model_dump_json() if hasattr(value, "model_dump_json") else str(value).strip().lower()
+        if key not in seen:
+            seen.add(key)
+            merged.append(value)
+    return merged
+
+def merge_summaries(summaries: List[Summary]) -> Summary:
+    """Combine summaries of separate resume chunks into one.
+
+    Scalar fields keep the first non-empty value (chunks are in document
+    order, so contact details come from the header chunk); list fields are
+    concatenated without duplicates.
+    """
+    merged = {}
+    for name, field in Summary.model_fields.items():
+        values = [getattr(s, name) for s in summaries]
+        if name == "contact_info":
+            merged[name] = ContactInfo(**{
+                key: next((getattr(v, key) for v in values if getattr(v, key)), None)
+                for key in ContactInfo.model_fields
+            })
+        elif isinstance(values[0], list):
+            merged[name] = _merge_list([item for value in values for item in value])
+        else:
+            merged[name] = next((v for v in values if v), values[0])
+    return Summary(**merged)
+
+def _summarize_sections_parallel(resume_text: str, api_key: str, budget: int) -> Summary:
+    chunks = chunk_sections(split_sections(resume_text), budget)
+    if len(chunks) <= 1:
+        return _summarize_text(resume_text, api_key)
+    with ThreadPoolExecutor(max_workers=min(len(chunks), 4)) as pool:
+        summaries = list(pool.map(lambda chunk: _summarize_text(join_sections(chunk), api_key), chunks))
+    return merge_summaries(summaries)
+
+def extract_resume_summary(resume_text: str, use_cache: bool = True,
+                           context: Optional[LLMContext] = None) -> str: # <--- Returns Summary object
+    """
+    Extract structured resume information using LLM with forced JSON output.
+
+    Results are cached on disk by resume text, prompt, schema and model, so a
+    repeat upload of the same resume skips the LLM call entirely. The text is
+    cleaned and held to RESUME_TOKEN_BUDGET tokens: lower-priority sections
+    are dropped, or with RESUME_PARALLEL_SECTIONS the sections are summarized
+    as parallel chunks and merged.
+
+    Args:
+        resume_text (str): The raw text content of the resume
+        use_cache (bool): Read from and write to the summary cache
+        context (LLMContext, optional): Session credentials; defaults to GROQ_API_KEY
+
+    Returns:
+        Summary: Structured resume data as a Pydantic model
+
+    Raises:
+        ValueError: If API key is not provided or found
+        Exception: For API or parsing errors
+    """
+    GROQ_API_KEY = resolve_context(context).api_key
+    if not GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY is not set.")
+
+    with span("summary.extract") as s:
+        cache = get_summary_cache() if use_cache else None
+        cache_key = summary_cache_key(resume_text)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                s.set(cache_hit=True)
+                return cached
+
+        cleaned_text = clean_resume_text(resume_text)
+        budget = get_resume_token_budget()
+        s.set(cache_hit=False, raw_tokens=estimate_tokens(resume_text), cleaned_tokens=estimate_tokens(cleaned_text))
+
+        try:
+            if budget and get_resume_parallel_sections() and estimate_tokens(cleaned_text) > budget:
+                parsed_summary = _summarize_sections_parallel(cleaned_text, GROQ_API_KEY, budget)
+            else:
+                prompt_text = join_sections(apply_token_budget(split_sections(cleaned_text), budget))
+                parsed_summary = _summarize_text(prompt_text, GROQ_API_KEY)
+
+            summary = parsed_summary.model_dump() # <--- Return the Pydantic object directly
+            if cache is not None:
+                cache.set(cache_key, summary, model_name=summary_model())
+            return summary
+
+        except ValidationError as ve:
+            print(f"Pydantic Validation Error: {ve}")
+            # Optionally re-raise or return a default/empty Summary object
+            raise # Re-raise if you want the error to propagate
+        except Exception as e:
+            print(f"API or general error during summary extraction: {e}")
+            raise # Re-raise for clarity
+
+def _sections_by_name(resume_text: str) -> Dict[str, List[ResumeSection]]:
+    sections = {}
+    for section in split_sections(clean_resume_text(resume_text)):
+        sections.setdefault(section.name, []).append(section)
+    return sections
+
+def _section_text(sections: List[ResumeSection]) -> str:
+    return " ".join(" ".join(s.text.split()) for s in sections)
+
+def update_resume_summary(resume_text: str, previous_text: str, previous_summary: dict, use_cache: bool = True,
+                          context: Optional[LLMContext] = None) -> dict:
+    """
+    Summarize a revised resume by re-extracting only the sections that changed.
+
+    The new and previous texts are split into sections and compared. The
+    LLM gets the changed sections and the summary section as text, plus the
+    fields already extracted from the unchanged sections as compact JSON.
+    From its reply come the fields owned by the changed sections (see
+    SECTION_FIELDS) and every whole-resume field (WHOLE_RESUME_FIELDS), so
+    the professional summary, target roles and skills always reflect the
+    revision; skills kept from an unchanged skills section are extended by
+    the reply rather than replaced. Fields of removed sections are emptied. If more than
+    RESUME_INCREMENTAL_MAX_CHANGE of the resume changed, it is summarized
+    from scratch instead.
+
+    Args:
+        resume_text (str): The revised resume text
+        previous_text (str): Text of the revision `previous_summary` came from
+        previous_summary (dict): Summary of the previous revision
+        use_cache (bool): Read from and write to the summary cache
+        context (LLMContext, optional): Session credentials; defaults to GROQ_API_KEY
+
+    Returns:
+        dict: The updated summary
+    """
+    GROQ_API_KEY = resolve_context(context).api_key
+    if not GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY is not set.")
+    max_change = get_resume_incremental_max_change()
+
+    with span("summary.update") as s:
+        cache = get_summary_cache() if use_cache else None
+        cache_key = summary_cache_key(resume_text)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                s.set(cache_hit=True)
+                return cached
+
+        new_sections = _sections_by_name(resume_text)
+        old_sections = _sections_by_name(previous_text)
+        changed = [name for name, sections in new_sections.items()
+                   if name not in old_sections or _section_text(sections) != _section_text(old_sections[name])]
+        removed = [name for name in old_sections if name not in new_sections]
+        total_tokens = sum(estimate_tokens(_section_text(v)) for v in new_sections.values()) or 1
+        changed_tokens = sum(estimate_tokens(_section_text(new_sections[name])) for name in changed)
+        s.set(cache_hit=False, changed=",".join(changed), removed=",".join(removed),
+              changed_share=round(changed_tokens / total_tokens, 3))
+
+        if not max_change or changed_tokens / total_tokens > max_change:
+            incr("summary_updates_total", mode="full")
+            return extract_resume_summary(resume_text, use_cache=use_cache, context=context)
+
+        merged = Summary(**previous_summary).model_dump()
+        if changed or removed:
+            defaults = Summary(professional_summary="").model_dump()
+            for name in removed:
+                for field in SECTION_FIELDS.get(name, ()):
+                    merged[field] = defaults[field]
+
+            sent = [name for name in new_sections if name in changed or name == "summary"]
+            sections = [section for name in sent for section in new_sections[name]]
+            known = {field: merged[field] for name in new_sections if name not in sent
+                     for field in SECTION_FIELDS.get(name, ()) if merged[field]}
+            known_text = INCREMENTAL_CONTEXT.format(fields=json.dumps(known, separators=(",", ":"))) if known else ""
+            # The context shares the token budget with the sections, which come
+            # first: if it would take over half, it is left out (the known
+            # fields are still kept below)
+            budget = get_resume_token_budget()
+            if budget and estimate_tokens(known_text) > budget // 2:
+                known_text = ""
+            section_budget = budget - estimate_tokens(known_text) if budget else 0
+            prompt_text = join_sections(apply_token_budget(sections, section_budget)) + known_text
+            partial = _summarize_text(prompt_text, GROQ_API_KEY).model_dump()
+            for field in WHOLE_RESUME_FIELDS + tuple(f for name in changed for f in SECTION_FIELDS.get(name, ())):
+                # Lists an unchanged section contributed to (its skills) were
+                # only shown as context, so the reply adds to them
+                if field in known and isinstance(partial[field], list):
+                    merged[field] = _merge_list(known[field] + partial[field])
+                else:
+                    merged[field] = partial[field]
+
+        summary = Summary(**merged).model_dump()
+        incr("summary_updates_total", mode="incremental" if changed or removed else "unchanged")
+        if cache is not None:
+            cache.set(cache_key, summary, model_name=summary_model())
+        return summary
 
 if __name__ == "__main__":
     sample_resume = """
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+from utils.config import (
+    get_summary_cache_dir,
+    get_summary_cache_max_entries,
+    get_summary_cache_ttl,
+)
+from utils.tracing import incr
+
+
+def normalize_resume_text(text: str) -> str:
+    """Collapse whitespace so trivially different extractions share a cache key."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def schema_fingerprint(model) -> str:
+    """Short hash of a Pydantic model's JSON schema (the schema "version")."""
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+def make_cache_key(resume_text: str, prompt_template: str, schema_version: str, model_name: str,
+                   settings: str = "") -> str:
+    """Key for one summary; `settings` covers options that change what is sent to the LLM."""
+    h = hashlib.sha256()
+    for part in (normalize_resume_text(resume_text), prompt_template, schema_version, model_name, settings):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class SummaryCache:
+    """Content-addressed on-disk cache of extracted resume summaries.
+
+    Each entry is one JSON file named after its key. Reads touch the file's
+    mtime so size eviction drops the least recently used entries first.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 500, ttl: int = 0):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            incr("summary_cache_misses_total")
+            return None
+
+        if self._expired(entry.get("created", 0)):
+            self.invalidate(key)
+            with self._lock:
+                self.misses += 1
+            incr("summary_cache_misses_total")
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        incr("summary_cache_hits_total")
+        return entry.get("summary")
+
+    def set(self, key: str, summary: dict, model_name: str = "") -> None:
+        entry = {"created": time.time(), "model": model_name, "summary": summary}
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def invalidate(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except OSError:
+            return False
+
+    def clear(self) -> int:
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and self.invalidate(name[:-5]):
+                removed += 1
+        return removed
+
+    def _entries(self) -> list:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.directory, name)), name[:-5]))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        now = time.time()
+        stale = [k for mtime, k in entries if self.ttl and now - mtime > self.ttl]
+        overflow = len(entries) - len(stale) - self.max_entries
+        if overflow > 0:
+            fresh = [k for mtime, k in entries if k not in stale]
+            stale.extend(fresh[:overflow])
+        for key in stale:
+            if self.invalidate(key):
+                with self._lock:
+                    self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries()),
+        }
+
+
+_default_cache: Optional[SummaryCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """The on-disk cache in SUMMARY_CACHE_DIR, opened on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SummaryCache(
+                get_summary_cache_dir(),
+                max_entries=get_summary_cache_max_entries(),
+                ttl=get_summary_cache_ttl(),
+            )
+        return _default_cache
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from utils.config import get_template_cache_max_entries
+from utils.tracing import incr
+
+
+def template_cache_key(user_input_json: str, model_name: str, variant: int = 0) -> str:
+    """Key for one generated template.
+
+    `user_input_json` is the serialized UserInput, so the summary, links,
+    job type and message type all take part.
+    """
+    h = hashlib.sha256()
+    for part in (user_input_json, model_name, str(variant)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class TemplateCache:
+    """In-memory LRU of generated message templates.
+
+    Templates are small and cheap to regenerate across restarts, so unlike
+    the summary cache nothing is written to disk.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            template = self._entries.get(key)
+            if template is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        incr("template_cache_hits_total" if template is not None else "template_cache_misses_total")
+        return template
+
+    def peek(self, key: str) -> Optional[str]:
+        """Like `get`, without counting a hit or miss or refreshing the entry."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, template: str) -> None:
+        with self._lock:
+            self._entries[key] = template
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+
+_default_cache: Optional[TemplateCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_template_cache() -> TemplateCache:
+    """The in-memory template cache; one session's templates are reused by any other with the same inputs."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TemplateCache(max_entries=get_template_cache_max_entries())
+        return _default_cache
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from utils.config import get_trace_jsonl_path
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    attrs: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Tracer:
+    """Collects pipeline spans and counters in memory.
+
+    Finished spans are kept in a bounded buffer and, when TRACE_JSONL is set,
+    appended to that file. Counters and per-stage timings can be exported in
+    Prometheus text format.
+    """
+
+    def __init__(self, jsonl_path: str = "", max_spans: int = 1000):
+        self.jsonl_path = jsonl_path
+        self.spans = deque(maxlen=max_spans)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        span = Span(name=name, start=time.time(), attrs=dict(attrs))
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.wall_ms = (time.perf_counter() - wall_start) * 1000
+            span.cpu_ms = (time.thread_time() - cpu_start) * 1000
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            for metric, value in (("stage_duration_seconds_sum", span.wall_ms / 1000),
+                                  ("stage_cpu_seconds_sum", span.cpu_ms / 1000),
+                                  ("stage_duration_seconds_count", 1)):
+                key = (metric, _labels_key({"stage": span.name}))
+                self.counters[key] = self.counters.get(key, 0) + value
+            if span.error:
+                key = ("stage_errors_total", _labels_key({"stage": span.name}))
+                self.counters[key] = self.counters.get(key, 0) + 1
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(asdict(span), default=str) + "\n")
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def export_jsonl(self, path: str) -> int:
+        """Write the buffered spans to `path`; returns how many were written."""
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(asdict(span), default=str) + "\n")
+        return len(spans)
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            items = sorted(self.counters.items())
+        lines = []
+        for (name, labels), value in items:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+_tracer = Tracer(jsonl_path=get_trace_jsonl_path())
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attrs):
+    return _tracer.span(name, **attrs)
+
+
+def incr(name: str, value: float = 1, **labels) -> None:
+    _tracer.incr(name, value, **labels)
+
+
+def record_llm_usage(span: Span, response, task: str) -> None:
+    """Copy token usage from a LangChain AIMessage onto `span` and the counters."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens", 0)
+    completion_tokens = usage.get("output_tokens", 0)
+    span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    incr("llm_requests_total", task=task)
+    incr("llm_prompt_tokens_total", prompt_tokens, task=task)
+    incr("llm_completion_tokens_total", completion_tokens, task=task)